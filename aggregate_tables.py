@@ -0,0 +1,107 @@
+import io
+import os
+import re
+import threading
+import pandas as pd
+import pyarrow.parquet as pq
+from cachetools import LRUCache
+from bulk_lookup import FUNDER_DOI_PREFIX, FUNDER_ID_PREFIX_PATTERN
+
+# (source, table) -> path without extension; Parquet is preferred, CSV is the fallback
+AGGREGATE_TABLES = {
+    ('crossref', 'unmapped'): 'data/aggregate_unmapped',
+    ('crossref', 'mapped'): 'data/aggregate_mapped',
+    ('datacite', 'unmapped'): 'data/datacite_aggregate_unmapped',
+    ('datacite', 'mapped'): 'data/datacite_aggregate_mapped',
+    ('combined', 'funders'): 'data/combined_aggregate',
+}
+DOWNLOAD_FORMATS = {'CSV': ('csv', 'text/csv'), 'Parquet': ('parquet', 'application/octet-stream')}
+
+# Serialized downloads by filters and file version, so reruns do not re-read and re-encode the tables
+_download_cache = LRUCache(maxsize=32)
+_download_cache_lock = threading.Lock()
+
+# Which sources a funder in the combined table has assertions in
+SOURCE_FILTERS = {
+    'Either': [],
+    'Crossref only': [('Crossref Count', '>=', 1), ('DataCite Count', '==', 0)],
+    'DataCite only': [('Crossref Count', '==', 0), ('DataCite Count', '>=', 1)],
+    'Both': [('Crossref Count', '>=', 1), ('DataCite Count', '>=', 1)],
+}
+
+
+def build_filters(min_count=None, id_prefix=None, ror_id=None):
+    filters = []
+    if min_count:
+        filters.append(('Count', '>=', int(min_count)))
+    if id_prefix:
+        bare_prefix = re.sub(FUNDER_ID_PREFIX_PATTERN, '', id_prefix.strip(), flags=re.IGNORECASE)
+        prefix = f'{FUNDER_DOI_PREFIX}{bare_prefix}'
+        # A string prefix is the half-open range [prefix, prefix with last char bumped)
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        filters.extend([('Funder ID', '>=', prefix), ('Funder ID', '<', upper)])
+    if ror_id:
+        filters.append(('ROR ID', '==', ror_id.strip()))
+    return filters
+
+
+def apply_filters(df, filters):
+    operators = {'>=': lambda a, b: a >= b, '<': lambda a, b: a < b, '==': lambda a, b: a == b}
+    mask = pd.Series(True, index=df.index)
+    for column, operator, value in filters:
+        mask &= operators[operator](df[column], value)
+    return df[mask]
+
+
+def aggregate_file(source, table):
+    path = AGGREGATE_TABLES[(source, table)]
+    return f'{path}.parquet' if os.path.exists(f'{path}.parquet') else f'{path}.csv'
+
+
+def read_aggregate(source, table, min_count=None, id_prefix=None, ror_id=None):
+    """Filtered aggregate table; filters on columns the file lacks are listed in attrs['unapplied_filters']."""
+    path = aggregate_file(source, table)
+    filters = build_filters(min_count, id_prefix, ror_id)
+    if path.endswith('.parquet'):
+        columns = pq.read_schema(path).names
+        applied = [f for f in filters if f[0] in columns]
+        # Filters are pushed down to row-group statistics, so only matching row groups are read
+        df = pq.read_table(path, filters=applied or None).to_pandas()
+    else:
+        df = pd.read_csv(path)
+        applied = [f for f in filters if f[0] in df.columns]
+        df = apply_filters(df, applied)
+    df.attrs['unapplied_filters'] = sorted({f[0] for f in filters if f not in applied})
+    return df
+
+
+def aggregate_download(source, table, file_format, min_count=None, id_prefix=None, ror_id=None):
+    """(bytes or text, row count, unapplied filter columns) for a filtered aggregate table download."""
+    path = aggregate_file(source, table)
+    stat = os.stat(path)
+    key = (source, table, file_format, min_count, id_prefix, ror_id, path, stat.st_mtime_ns, stat.st_size)
+    with _download_cache_lock:
+        download = _download_cache.get(key)
+    if download is None:
+        df = read_aggregate(source, table, min_count, id_prefix, ror_id)
+        data = to_parquet_bytes(df) if file_format == 'Parquet' else df.to_csv(index=False)
+        download = (data, len(df), df.attrs['unapplied_filters'])
+        with _download_cache_lock:
+            _download_cache[key] = download
+    return download
+
+
+def combined_slice(table, mapped=None, sources='Either', min_total=None, id_prefix=None):
+    """Rows of the combined Crossref/DataCite table matching the filters, in table (descending total) order."""
+    filters = build_filters(id_prefix=id_prefix) + SOURCE_FILTERS[sources]
+    if min_total:
+        filters.append(('Total', '>=', int(min_total)))
+    if mapped is not None:
+        filters.append(('Mapped', '==', mapped))
+    return apply_filters(table, filters)
+
+
+def to_parquet_bytes(df):
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    return buffer.getvalue()
@@ -0,0 +1,56 @@
+import re
+import pandas as pd
+import data_store
+
+FUNDER_DOI_PREFIX = 'http://dx.doi.org/10.13039/'
+# Matches every prefix form seen in metadata: http(s)://(dx.)doi.org/10.13039/, doi:10.13039/ or bare 10.13039/
+FUNDER_ID_PREFIX_PATTERN = r'^(?:(?:https?://)?(?:dx\.)?doi\.org/|doi:)?(?:10\.13039/)?'
+# Header labels of the first column, compared lowercase with '_' and '-' read as spaces
+FUNDER_ID_HEADERS = {'funder id', 'funder', 'id', 'doi', 'funder doi', 'funder identifier'}
+ROR_ID_PATTERN = re.compile(r'^(?:https?://)?(?:ror\.org/)?(0[a-z0-9]{6}[0-9]{2})$', re.IGNORECASE)
+
+
+def read_funder_ids(data):
+    """Read the first column of an uploaded CSV or newline-separated list of Funder IDs."""
+    if isinstance(data, bytes):
+        data = data.decode('utf-8-sig')
+    lines = pd.Series(data.splitlines(), dtype=object)
+    ids = lines.str.split(',', n=1).str[0].str.strip().str.strip('"').str.strip()
+    ids = ids[ids != ''].reset_index(drop=True)
+    # Drop a header row such as "Funder ID"; any other unreadable first row is reported as invalid
+    if len(ids) and re.sub(r'[\s_-]+', ' ', ids.iloc[0].lower()) in FUNDER_ID_HEADERS:
+        ids = ids.iloc[1:].reset_index(drop=True)
+    return ids
+
+
+def normalize_funder_ids(ids):
+    bare = ids.str.strip().str.replace(FUNDER_ID_PREFIX_PATTERN, '', regex=True, case=False)
+    return bare.where(bare.str.fullmatch(r'\d+', na=False))
+
+
+def normalize_funder_id(funder_id):
+    bare = re.sub(FUNDER_ID_PREFIX_PATTERN, '', funder_id.strip(), flags=re.IGNORECASE)
+    return bare if bare.isdigit() else None
+
+
+def normalize_ror_id(ror_id):
+    match = ROR_ID_PATTERN.match(ror_id.strip())
+    return f'https://ror.org/{match.group(1).lower()}' if match else None
+
+
+def resolve_funder_ids(ids):
+    mapping = data_store.get('mapping_series')
+    bare = normalize_funder_ids(ids)
+    ror_ids = bare.map(mapping)
+    return pd.DataFrame({
+        'Input': ids,
+        'Funder ID': FUNDER_DOI_PREFIX + bare,
+        'ROR ID': ror_ids,
+        'Mapped': ror_ids.notna(),
+    })
+
+
+def iter_csv(resolved, chunk_size=100000):
+    yield resolved.iloc[:0].to_csv(index=False)
+    for start in range(0, len(resolved), chunk_size):
+        yield resolved.iloc[start:start + chunk_size].to_csv(index=False, header=False)
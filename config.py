@@ -0,0 +1,7 @@
+import os
+
+# Upstream API base URLs, read once at startup; set them in the environment to use a mirror
+# or the local stand-in that load_test.py starts
+CROSSREF_API_URL = os.environ.get('CROSSREF_API_URL', 'https://api.crossref.org')
+ROR_API_URL = os.environ.get('ROR_API_URL', 'https://api.ror.org')
+DATACITE_API_URL = os.environ.get('DATACITE_API_URL', 'https://api.datacite.org')
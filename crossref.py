@@ -0,0 +1,65 @@
+import threading
+from types import MappingProxyType
+import requests
+from cachetools import TTLCache
+import data_store
+import singleflight
+from config import CROSSREF_API_URL
+
+COUNT_FUNDERS_TIMEOUT = 120
+MEMBER_FUNDERS_TTL = 3600
+
+# Shared by all sessions and the JSON API so repeat lookups of a member do not re-query Crossref
+_member_funders_cache = TTLCache(maxsize=256, ttl=MEMBER_FUNDERS_TTL)
+_member_funders_lock = threading.Lock()
+
+
+def query_member_funders(member_id, rows=1000):
+    base_url = f'{CROSSREF_API_URL}/members'
+    url = f"{base_url}/{member_id}/works"
+    funder_counts = {}
+    params = {'filter': 'has-funder:true',
+              'facet': 'funder-doi:*', 'rows': rows}
+    try:
+        # Bounds the singleflight leader too, so a hung connection cannot block the key
+        response = requests.get(url, params=params, timeout=COUNT_FUNDERS_TIMEOUT)
+    except requests.exceptions.Timeout as e:
+        raise TimeoutError(f'Crossref did not answer for member {member_id} within {COUNT_FUNDERS_TIMEOUT}s') from e
+    if response.status_code == 200:
+        data = response.json()
+        funders = data.get('message', {}).get('facets', {}).get(
+            'funder-doi', {}).get('values', None)
+        if funders:
+            for funder_id, count_works in funders.items():
+                funder_id = funder_id.replace(
+                    'https://doi.org/10.13039/', '')
+                funder_counts[funder_id] = count_works
+            return funder_counts
+    return None
+
+
+def local_member_funders(member_id):
+    """Counts for a member from the table built from a Crossref public data file, if one is loaded."""
+    if not data_store.available('member_funder_counts'):
+        return None
+    counts = data_store.get('member_funder_counts')
+    start, stop = counts['member_id'].searchsorted([member_id, member_id + 1])
+    rows = counts.iloc[start:stop]
+    return MappingProxyType(dict(zip(rows['funder_id'], rows['count'].tolist()))) or None
+
+
+def count_funders(member_id, rows=1000):
+    funder_counts = local_member_funders(int(member_id))
+    if funder_counts:
+        return funder_counts
+    key = (member_id, rows)
+    with _member_funders_lock:
+        if key in _member_funders_cache:
+            return _member_funders_cache[key]
+    # Sessions opening the same member at once share one facet query
+    funder_counts = singleflight.group('Crossref member funders').do(
+        key, lambda: query_member_funders(member_id, rows), timeout=COUNT_FUNDERS_TIMEOUT)
+    if funder_counts:
+        with _member_funders_lock:
+            _member_funders_cache[key] = funder_counts
+    return funder_counts
@@ -0,0 +1,288 @@
+import gc
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+from types import MappingProxyType
+import pandas as pd
+from overlap import build_ror_index, ror_index_counts, combined_funder_table
+
+
+def load_json(filename):
+    with open(filename, 'r') as file:
+        data = json.load(file)
+    return data
+
+
+def load_mapping(mapping_file):
+    return MappingProxyType(load_json(mapping_file))
+
+
+def load_mapping_series(mapping_file):
+    mapping = pd.Series(load_json(mapping_file), name='ROR ID', dtype=object)
+    mapping.index.name = 'funder_id'
+    return mapping
+
+
+def load_funders(funders_file):
+    funders = load_json(funders_file)
+    return MappingProxyType({funder['primary-name']: funder['id'] for funder in funders['funders']})
+
+
+def load_members(members_file):
+    members = load_json(members_file)
+    return MappingProxyType({member['primary-name']: member['id'] for member in members['members']})
+
+
+def load_funder_counts(funder_counts_file):
+    funders = load_json(funder_counts_file)
+    return MappingProxyType({funder_id.replace('http://dx.doi.org/10.13039/', ''): count_works
+                             for funder_id, count_works in funders.items()})
+
+
+def load_funder_ancestors(closure_file):
+    closure = pd.read_csv(closure_file, dtype={'Funder ID': str, 'Ancestor ID': str, 'Depth': 'int16'})
+    closure.columns = ['funder_id', 'ancestor_id', 'depth']
+    for column in ('funder_id', 'ancestor_id'):
+        closure[column] = closure[column].str.replace('http://dx.doi.org/10.13039/', '', regex=False)
+    return closure
+
+
+def load_member_funder_counts(member_counts_file):
+    # Categorical Funder IDs keep millions of member/funder rows compact
+    counts = pd.read_csv(member_counts_file, dtype={'Member ID': 'int32', 'Funder ID': str, 'Work Count': 'int32'})
+    counts.columns = ['member_id', 'funder_id', 'count']
+    counts['funder_id'] = counts['funder_id'].str.replace('http://dx.doi.org/10.13039/', '', regex=False).astype('category')
+    return counts.sort_values('member_id', kind='stable', ignore_index=True)
+
+
+def load_ror_index(index_file):
+    if os.path.exists(index_file):
+        index = load_json(index_file)
+    else:
+        # Until a refresh writes the index, derive it from the mapping (without org names)
+        index = build_ror_index(dependency('mapping'))
+    # Counts are summed at load time so a counts refresh (which reloads this dataset) is reflected
+    crossref_counts, datacite_counts = dependency('crossref_counts'), dependency('datacite_counts')
+    return MappingProxyType({ror_id: MappingProxyType({'name': entry['name'], 'funder_ids': tuple(entry['funder_ids']),
+                                                       **ror_index_counts(entry, crossref_counts, datacite_counts)})
+                             for ror_id, entry in index.items()})
+
+
+def load_ror_names(index_file):
+    return MappingProxyType({entry['name']: ror_id for ror_id, entry in dependency('ror_index').items() if entry['name']})
+
+
+def load_combined_funders(combined_file):
+    if os.path.exists(combined_file):
+        return pd.read_csv(combined_file, dtype={'Funder ID': str, 'ROR ID': object, 'Mapped': bool})
+    # Until a refresh writes the table, join the loaded sources
+    return combined_funder_table(dependency('mapping_series'), dependency('crossref_counts'), dependency('datacite_counts'))
+
+
+# Reference data shared by every session in the process: name -> (path, loader)
+DATASETS = {
+    'mapping': ('data/ror_funder_registry_mapping.json', load_mapping),
+    'mapping_series': ('data/ror_funder_registry_mapping.json', load_mapping_series),
+    'funders': ('data/funders.json', load_funders),
+    'members': ('data/members.json', load_members),
+    'crossref_counts': ('data/crossref_funders.json', load_funder_counts),
+    'datacite_counts': ('data/datacite_funders.json', load_funder_counts),
+    'funder_ancestors': ('data/funder_ancestors.csv', load_funder_ancestors),
+    'member_funder_counts': ('data/crossref_member_funders.csv', load_member_funder_counts),
+    'ror_index': ('data/ror_funder_index.json', load_ror_index),
+    'ror_names': ('data/ror_funder_index.json', load_ror_names),
+    'combined_funders': ('data/combined_aggregate.csv', load_combined_funders),
+}
+# Derived datasets are reloaded whenever a dataset they are built from changes
+DEPENDENCIES = {
+    'ror_index': ('mapping', 'crossref_counts', 'datacite_counts'),
+    'ror_names': ('ror_index',),
+    'combined_funders': ('mapping_series', 'crossref_counts', 'datacite_counts'),
+}
+MANIFEST_FILE = 'data/manifest.json'
+MANIFEST_POLL_INTERVAL = 30
+
+# Reentrant: derived datasets load the datasets they are built from
+_load_lock = threading.RLock()
+# (datasets, versions) published together so a reader never pairs data with the wrong version
+_snapshot = (MappingProxyType({}), MappingProxyType({}))
+# Datasets loaded by the current refresh but not yet published
+_staged = {}
+_staged_versions = {}
+_generation = 0
+# (generation, report): sizing walks every dataset, so it is done once per snapshot
+_memory_report = (None, [])
+_manifest = {}
+_manifest_mtime = None
+_manifest_checked = 0
+
+
+def file_sha256(filename):
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _swap(loaded, loaded_versions):
+    # Readers only ever see a complete snapshot: the new store is built aside
+    # and published with a single reference assignment.
+    global _snapshot, _generation
+    store, versions = dict(_snapshot[0]), dict(_snapshot[1])
+    store.update(loaded)
+    versions.update(loaded_versions)
+    _snapshot = (MappingProxyType(store), MappingProxyType(versions))
+    _generation += 1
+    return _snapshot[0]
+
+
+def _load(name):
+    path, loader = DATASETS[name]
+    _staged[name] = loader(path)
+    if os.path.exists(path):
+        _staged_versions[name] = file_sha256(path)
+    else:
+        _staged_versions[name] = '+'.join(_staged_versions.get(dependency_name) or version(dependency_name)
+                                          for dependency_name in DEPENDENCIES.get(name, ()))
+
+
+def get(name):
+    store = _snapshot[0]
+    if name in store:
+        return store[name]
+    return _load_and_swap([name])[name]
+
+
+def version(name):
+    """Content hash of the file a dataset was loaded from (derived datasets combine their sources)."""
+    get(name)
+    return _snapshot[1][name]
+
+
+def available(name):
+    return name in _snapshot[0] or os.path.exists(DATASETS[name][0])
+
+
+def dependency(name):
+    """Dataset for a derived loader: the copy staged by the running refresh, if any."""
+    if name in _staged:
+        return _staged[name]
+    return get(name)
+
+
+def _load_and_swap(names):
+    # DATASETS order puts sources before the datasets derived from them
+    with _load_lock:
+        if _staged:
+            # Nested lazy load from inside a running refresh
+            for name in names:
+                if name not in _staged and name not in _snapshot[0]:
+                    _load(name)
+            return {**_snapshot[0], **_staged}
+        try:
+            for name in DATASETS:
+                if name in names:
+                    _load(name)
+            return _swap(_staged, _staged_versions)
+        finally:
+            _staged.clear()
+            _staged_versions.clear()
+
+
+def refresh(names=None):
+    return _load_and_swap([name for name in DATASETS if names is None or name in names])
+
+
+def warm():
+    """Load every dataset whose file is present; missing ones fail on first use."""
+    poll_manifest(force=True)
+    return _load_and_swap([name for name, (path, loader) in DATASETS.items() if os.path.exists(path)])
+
+
+def generation():
+    return _generation
+
+
+def with_dependents(names):
+    names = set(names)
+    changed = True
+    while changed:
+        dependents = {name for name, sources in DEPENDENCIES.items() if names & set(sources)}
+        changed = not dependents <= names
+        names |= dependents
+    return names
+
+
+def poll_manifest(force=False):
+    """Reload only the datasets whose file hash in the manifest differs from the loaded copy.
+
+    Cheap to call on every request: the manifest is stat'ed at most every
+    MANIFEST_POLL_INTERVAL seconds and only parsed when its mtime changes.
+    """
+    global _manifest, _manifest_mtime, _manifest_checked
+    now = time.time()
+    if not force and now - _manifest_checked < MANIFEST_POLL_INTERVAL:
+        return []
+    _manifest_checked = now
+    try:
+        mtime = os.stat(MANIFEST_FILE).st_mtime
+    except FileNotFoundError:
+        return []
+    if mtime == _manifest_mtime:
+        return []
+    with _load_lock:
+        try:
+            manifest = load_json(MANIFEST_FILE)
+        except ValueError:
+            # Caught mid-copy; the mtime is not recorded, so the next poll retries
+            return []
+        artifacts = manifest.get('artifacts', {})
+        loaded_versions = _snapshot[1]
+        changed = [name for name, (path, loader) in DATASETS.items()
+                   if name in loaded_versions and os.path.basename(path) in artifacts
+                   and artifacts[os.path.basename(path)]['sha256'] != loaded_versions[name]]
+        if changed:
+            refresh(with_dependents(changed))
+        _manifest, _manifest_mtime = manifest, mtime
+        return changed
+
+
+def manifest_versions():
+    return {key: value for key, value in _manifest.items() if key != 'artifacts'}
+
+
+def deep_sizeof(obj, seen=None):
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if hasattr(obj, 'memory_usage'):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, 'sum') else int(usage)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, MappingProxyType):
+        # The proxy itself is tiny; count the hash table it wraps, without copying it
+        size += sys.getsizeof(gc.get_referents(obj)[0])
+    if isinstance(obj, (dict, MappingProxyType)):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    return size
+
+
+def memory_report():
+    global _memory_report
+    generation, report = _memory_report
+    if generation == _generation:
+        return report
+    generation, store = _generation, _snapshot[0]
+    report = [{'Dataset': name,
+               'Entries': len(value),
+               'Size (MB)': round(deep_sizeof(value) / 1024 ** 2, 2)}
+              for name, value in store.items()]
+    _memory_report = (generation, report)
+    return report
@@ -0,0 +1,121 @@
+import time
+import uuid
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
+
+MAX_WORKERS = 4
+MAX_PENDING = 32
+# Finished jobs stay visible this long so the session that submitted them can pick up the outcome
+JOB_TTL = 600
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = 'queued'
+        self.progress = 'Waiting for a worker'
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.finished = None
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self.status in ('done', 'failed')
+
+    def wait(self, timeout):
+        """Block until the job finishes or timeout seconds pass; True if it finished."""
+        return self._done.wait(timeout)
+
+
+class JobQueue:
+    """Bounded background worker pool; jobs for a key already queued or running are coalesced."""
+
+    def __init__(self, name, max_workers=MAX_WORKERS, max_pending=MAX_PENDING):
+        self.name = name
+        self.max_jobs = max_workers + max_pending
+        self.metrics = Counter()
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix=f'jobs-{name}')
+        # Queued and running jobs by key and by ID; only finished jobs move to the TTL cache
+        self._active = {}
+        self._active_ids = {}
+        self._finished = TTLCache(maxsize=4096, ttl=JOB_TTL)
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn):
+        """Queue fn(job) and return the job ID; fn reports progress by setting job.progress."""
+        with self._lock:
+            job = self._active.get(key)
+            if job is not None:
+                self.metrics['coalesced'] += 1
+                return job.id
+            if len(self._active) >= self.max_jobs:
+                self.metrics['rejected'] += 1
+                raise QueueFullError(f'{self.name}: {len(self._active)} jobs already queued or running')
+            job = self._active[key] = Job(key)
+            self._active_ids[job.id] = job
+            self.metrics['submitted'] += 1
+        self._executor.submit(self._run, job, fn)
+        return job.id
+
+    def _run(self, job, fn):
+        job.status, job.progress = 'running', 'Started'
+        try:
+            job.result = fn(job)
+            job.status = 'done'
+        except Exception as e:
+            job.error = e
+            job.status = 'failed'
+        finally:
+            job.finished = time.time()
+            with self._lock:
+                del self._active[job.key]
+                del self._active_ids[job.id]
+                self._finished[job.id] = job
+                self.metrics['completed' if job.status == 'done' else 'failed'] += 1
+            job._done.set()
+
+    def get(self, job_id):
+        """The job, or None once it finished more than JOB_TTL seconds ago."""
+        with self._lock:
+            return self._active_ids.get(job_id) or self._finished.get(job_id)
+
+    def counts(self):
+        with self._lock:
+            running = sum(job.status == 'running' for job in self._active.values())
+            return running, len(self._active) - running
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def queue(name):
+    with _queues_lock:
+        if name not in _queues:
+            _queues[name] = JobQueue(name)
+        return _queues[name]
+
+
+def metrics_report():
+    with _queues_lock:
+        queues = list(_queues.values())
+    report = []
+    for job_queue in queues:
+        running, queued = job_queue.counts()
+        report.append({'Queue': job_queue.name,
+                       'Running': running,
+                       'Queued': queued,
+                       'Submitted': job_queue.metrics['submitted'],
+                       'Coalesced': job_queue.metrics['coalesced'],
+                       'Rejected': job_queue.metrics['rejected'],
+                       'Failed': job_queue.metrics['failed']})
+    return report
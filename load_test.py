@@ -0,0 +1,433 @@
+import os
+import re
+import sys
+import json
+import time
+import pickle
+import random
+import shutil
+import argparse
+import functools
+import tempfile
+import threading
+import contextlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+import pandas as pd
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+FUNDER_DOI_PREFIX = 'https://doi.org/10.13039/'
+
+
+def load_json(filename):
+    with open(filename, 'r') as file:
+        return json.load(file)
+
+
+def load_counts(filename):
+    return {funder_id.replace('http://dx.doi.org/10.13039/', ''): count
+            for funder_id, count in load_json(filename).items()}
+
+
+def sample_counts(funder_ids, counts, seed, max_funders):
+    # Deterministic per member/repository so repeat lookups see the same data
+    rng = random.Random(seed)
+    sample = rng.sample(funder_ids, min(len(funder_ids), rng.randint(10, max_funders)))
+    return {funder_id: rng.randint(1, max(1, counts[funder_id] // 100)) for funder_id in sample}
+
+
+class UpstreamStandIn(BaseHTTPRequestHandler):
+    """Local stand-in for the Crossref, ROR and DataCite endpoints the views call.
+
+    Responses are synthesized from the data files with the same shape as the
+    real APIs, after a fixed delay that models upstream latency.
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, body, status=200):
+        time.sleep(self.server.latency)
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        member_match = re.match(r'^/members/(\d+)/works$', url.path)
+        if member_match:
+            funders = sample_counts(self.server.crossref_ids, self.server.crossref_counts, f'crossref:{member_match.group(1)}', self.server.max_funders)
+            values = {f'{FUNDER_DOI_PREFIX}{funder_id}': count for funder_id, count in funders.items()}
+            self.send_json({'status': 'ok', 'message': {'total-results': sum(values.values()),
+                                                        'facets': {'funder-doi': {'value-count': len(values), 'values': values}}}})
+        elif url.path == '/organizations':
+            funder_id = parse_qs(url.query).get('query', [''])[0]
+            ror_id = self.server.mapping.get(funder_id)
+            items = [{'id': ror_id, 'names': [{'value': f'Organization {ror_id[-9:]}', 'types': ['ror_display', 'label']}]}] if ror_id else []
+            self.send_json({'number_of_results': len(items), 'items': items})
+        else:
+            self.send_json({'status': 'error', 'message': 'Not found'}, status=404)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        if urlparse(self.path).path == '/graphql':
+            variables = body.get('variables') or {}
+            seed = f"datacite:{variables.get('repositoryId')}:{variables.get('memberId')}"
+            funders = sample_counts(self.server.datacite_ids, self.server.datacite_counts, seed, self.server.max_funders)
+            facets = [{'id': f'{FUNDER_DOI_PREFIX}{funder_id}', 'title': funder_id, 'count': count}
+                      for funder_id, count in funders.items()]
+            self.send_json({'data': {'works': {'totalCount': sum(funders.values()), 'funders': facets}}})
+        else:
+            self.send_json({'errors': [{'message': 'Not found'}]}, status=404)
+
+
+def start_stand_in(data_dir, latency, max_funders):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), UpstreamStandIn)
+    server.daemon_threads = True
+    server.latency = latency
+    server.max_funders = max_funders
+    server.crossref_counts = load_counts(os.path.join(data_dir, 'crossref_funders.json'))
+    server.datacite_counts = load_counts(os.path.join(data_dir, 'datacite_funders.json'))
+    server.crossref_ids = sorted(server.crossref_counts)
+    server.datacite_ids = sorted(server.datacite_counts)
+    server.mapping = load_json(os.path.join(data_dir, 'ror_funder_registry_mapping.json'))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def prepare_data_dir(members):
+    """Working copy of data/ with the reference files the views need.
+
+    members.json and funders.json are not checked in; when absent they are
+    synthesized from the count files so every view has options to select.
+    """
+    work_dir = tempfile.mkdtemp(prefix='overlap_load_test_')
+    data_dir = os.path.join(work_dir, 'data')
+    shutil.copytree(DATA_DIR, data_dir)
+    if not os.path.exists(os.path.join(data_dir, 'members.json')):
+        with open(os.path.join(data_dir, 'members.json'), 'w') as file:
+            json.dump({'members': [{'id': member_id, 'primary-name': f'Member {member_id}'}
+                                   for member_id in range(1, members + 1)]}, file)
+    if not os.path.exists(os.path.join(data_dir, 'funders.json')):
+        funder_ids = sorted(set(load_counts(os.path.join(data_dir, 'crossref_funders.json')))
+                            | set(load_counts(os.path.join(data_dir, 'datacite_funders.json'))))
+        with open(os.path.join(data_dir, 'funders.json'), 'w') as file:
+            json.dump({'funders': [{'id': funder_id, 'primary-name': f'Funder {funder_id}'}
+                                   for funder_id in funder_ids]}, file)
+    return work_dir
+
+
+_session = threading.local()
+
+
+class RerunRequested(Exception):
+    pass
+
+
+class ScriptedStreamlit:
+    """Stands in for the streamlit module so each thread runs the app as one scripted session.
+
+    Input widgets answer from the session's script (random selections, the
+    submit button pressed); output elements are no-ops.
+    """
+
+    def __init__(self, sidebar=False):
+        self._sidebar = sidebar
+
+    @property
+    def session_state(self):
+        return _session.current.state
+
+    @property
+    def sidebar(self):
+        return ScriptedStreamlit(sidebar=True)
+
+    def button(self, label, *args, **kwargs):
+        # Buttons only read as pressed on the first run of a page load, as in Streamlit
+        session = _session.current
+        if session.reruns:
+            return False
+        return label == session.view_name if self._sidebar else True
+
+    def selectbox(self, label, options, *args, **kwargs):
+        options = list(options)
+        return _session.current.rng.choice(options[1:]) if len(options) > 1 else (options[0] if options else None)
+
+    def radio(self, label, options, *args, **kwargs):
+        return _session.current.rng.choice(list(options))
+
+    def checkbox(self, label, *args, **kwargs):
+        return _session.current.rng.random() < 0.5
+
+    def text_input(self, label, *args, **kwargs):
+        return _session.current.text_inputs(label)
+
+    text_area = text_input
+
+    def number_input(self, label, *args, value=None, min_value=None, **kwargs):
+        return value if value is not None else min_value
+
+    def file_uploader(self, *args, **kwargs):
+        return None
+
+    def columns(self, spec, *args, **kwargs):
+        return [self] * (spec if isinstance(spec, int) else len(spec))
+
+    def spinner(self, *args, **kwargs):
+        return contextlib.nullcontext()
+
+    expander = spinner
+
+    def experimental_rerun(self):
+        raise RerunRequested()
+
+    def write(self, *args, **kwargs):
+        if args and isinstance(args[0], str) and 'Timed out' in args[0]:
+            _session.current.timeouts += 1
+
+    def __getattr__(self, name):
+        # title, markdown, image, dataframe, download_button, ...
+        return lambda *args, **kwargs: None
+
+
+class ScriptedSession:
+    def __init__(self, index, rng, ror_ids, funder_ids, bulk_size):
+        self.index = index
+        self.rng = rng
+        self.state = {}
+        self.view_name = None
+        self.timeouts = 0
+        self.reruns = 0
+        self.ror_ids = ror_ids
+        self.funder_ids = funder_ids
+        self.bulk_size = bulk_size
+
+    def text_inputs(self, label):
+        if label.startswith('Enter DataCite'):
+            return f'repository.{self.rng.randint(1, 500)}'
+        if label.startswith('Or enter ROR ID'):
+            return self.rng.choice(self.ror_ids)
+        if label.startswith('Or paste Funder IDs'):
+            return '\n'.join(self.rng.choices(self.funder_ids, k=self.bulk_size))
+        return ''
+
+
+def scripted_cache(copy_results):
+    """Per-process stand-in for st.cache_resource (copy_results=False) and st.cache_data.
+
+    Without a Streamlit runtime both decorators run the function on every call.
+    Like Streamlit, cache_data hands out an unpickled copy on each hit and
+    exceptions are not cached.
+    """
+    def decorator(func):
+        results, lock = {}, threading.Lock()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            with lock:
+                found = key in results
+                result = results.get(key)
+            if not found:
+                value = func(*args, **kwargs)
+                result = pickle.dumps(value) if copy_results else value
+                with lock:
+                    result = results.setdefault(key, result)
+            return pickle.loads(result) if copy_results else result
+
+        def clear():
+            with lock:
+                results.clear()
+
+        wrapper.clear = clear
+        return wrapper
+
+    def cache(func=None, **options):
+        # Used both bare (@st.cache_data) and with options (@st.cache_data(show_spinner=False))
+        return decorator(func) if func is not None else decorator
+    return cache
+
+
+def install_scripted_streamlit():
+    # The app's cache decorators are applied at import, so they are replaced first
+    import streamlit
+    streamlit.cache_resource = scripted_cache(copy_results=False)
+    streamlit.cache_data = scripted_cache(copy_results=True)
+    import main
+    scripted = ScriptedStreamlit()
+    for name, module in list(sys.modules.items()):
+        if (name == 'main' or name.startswith('views.')) and getattr(module, 'st', None) is not None:
+            module.st = scripted
+    return main
+
+
+def reset_caches():
+    # Each session-count level starts from the same cold per-entity caches
+    import crossref
+    from views import member_view, datacite_repository_view, funder_lookup_view, unmapped_ranking_panel
+    for cache, lock in ((crossref._member_funders_cache, crossref._member_funders_lock),
+                        (member_view._member_report_cache, member_view._member_report_lock),
+                        (member_view._chart_cache, member_view._chart_cache_lock),
+                        (datacite_repository_view._funder_counts_cache, datacite_repository_view._funder_counts_lock),
+                        (unmapped_ranking_panel._ranking_cache, unmapped_ranking_panel._ranking_cache_lock)):
+        with lock:
+            cache.clear()
+    funder_lookup_view.search_ror.clear()
+
+
+def rss_mb():
+    try:
+        with open('/proc/self/statm', 'r') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_session(main, session, view_names, page_loads, think_time, results, results_lock):
+    _session.current = session
+    for page_load in range(page_loads):
+        # Sessions start on different views so every view is loaded at every level
+        session.view_name = view_names[(session.index + page_load) % len(view_names)]
+        timeouts = session.timeouts
+        session.reruns = 0
+        start = time.perf_counter()
+        error = None
+        # A page load ends when a run finishes without asking for a rerun (e.g. a polled job completing)
+        while True:
+            try:
+                main.main()
+            except RerunRequested:
+                session.reruns += 1
+                continue
+            except Exception as e:
+                error = f'{type(e).__name__}: {e}'
+            break
+        elapsed = time.perf_counter() - start
+        with results_lock:
+            results.append({'View': session.view_name, 'Latency': elapsed, 'Error': error,
+                            'Timed out': session.timeouts > timeouts, 'Reruns': session.reruns})
+        if think_time:
+            time.sleep(session.rng.expovariate(1 / think_time))
+
+
+def run_level(main, sessions, view_names, page_loads, think_time, seed, ror_ids, funder_ids, bulk_size):
+    results, results_lock = [], threading.Lock()
+    threads = [threading.Thread(target=run_session, args=(
+        main, ScriptedSession(index, random.Random(f'{seed}:{sessions}:{index}'), ror_ids, funder_ids, bulk_size),
+        view_names, page_loads, think_time, results, results_lock)) for index in range(sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return pd.DataFrame(results), time.perf_counter() - start
+
+
+def summarize(results, elapsed, sessions, rss):
+    latencies = results['Latency'].to_numpy() * 1000
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+    return {'Sessions': sessions,
+            'Page loads': len(results),
+            'Throughput (/s)': round(len(results) / elapsed, 2),
+            'p50 (ms)': round(p50, 1),
+            'p90 (ms)': round(p90, 1),
+            'p99 (ms)': round(p99, 1),
+            'Max (ms)': round(latencies.max(), 1),
+            'Errors': int(results['Error'].notna().sum()),
+            'Timeouts': int(results['Timed out'].sum()),
+            'Reruns': int(results['Reruns'].sum()),
+            'RSS (MB)': round(rss, 1)}
+
+
+def summarize_views(results, sessions):
+    rows = []
+    for view_name, view_results in results.groupby('View', sort=False):
+        latencies = view_results['Latency'].to_numpy() * 1000
+        p50, p99 = np.percentile(latencies, [50, 99])
+        rows.append({'Sessions': sessions, 'View': view_name, 'Page loads': len(view_results),
+                     'p50 (ms)': round(p50, 1), 'p99 (ms)': round(p99, 1),
+                     'Errors': int(view_results['Error'].notna().sum())})
+    return rows
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description='Drive concurrent scripted sessions through every view in main.py against local upstream stand-ins')
+    parser.add_argument('-s', '--sessions', default='1,5,10,25',
+                        help='Comma-separated concurrent session counts to run in turn')
+    parser.add_argument('-n', '--page-loads', type=int, default=14,
+                        help='Page loads per session at each level')
+    parser.add_argument('-v', '--views', default=None,
+                        help='Comma-separated view names to include (default: all views in main.py)')
+    parser.add_argument('-l', '--upstream-latency', type=float, default=0.2,
+                        help='Seconds each stand-in upstream response is delayed')
+    parser.add_argument('-t', '--think-time', type=float, default=0,
+                        help='Mean seconds a session waits between page loads')
+    parser.add_argument('--max-funders', type=int, default=2000,
+                        help='Upper bound on funders in a synthesized member/repository facet')
+    parser.add_argument('--members', type=int, default=500,
+                        help='Members to synthesize when data/members.json is absent')
+    parser.add_argument('--bulk-size', type=int, default=1000,
+                        help='Funder IDs pasted into each bulk lookup')
+    parser.add_argument('--warm-caches', action='store_true',
+                        help='Keep lookup, chart and ranking caches between levels')
+    parser.add_argument('--seed', default='load-test', help='Seed for the scripted sessions')
+    parser.add_argument('-o', '--output', default=None, help='Write the per-view results to this CSV file')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    session_counts = [int(count) for count in args.sessions.split(',')]
+    output = os.path.abspath(args.output) if args.output else None
+    work_dir = prepare_data_dir(args.members)
+    stand_in = start_stand_in(os.path.join(work_dir, 'data'), args.upstream_latency, args.max_funders)
+    stand_in_url = f'http://127.0.0.1:{stand_in.server_address[1]}'
+    # config.py reads the upstream base URLs when the app is imported
+    for variable in ('CROSSREF_API_URL', 'ROR_API_URL', 'DATACITE_API_URL'):
+        os.environ[variable] = stand_in_url
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(work_dir)
+    try:
+        app = install_scripted_streamlit()
+        view_names = args.views.split(',') if args.views else list(app.views)
+        unknown = [view_name for view_name in view_names if view_name not in app.views]
+        if unknown:
+            sys.exit(f'Unknown views: {", ".join(unknown)}')
+        start = time.perf_counter()
+        app.warm_data_store()
+        print(f'Warmed data store in {time.perf_counter() - start:.1f}s, RSS {rss_mb():.1f} MB')
+        mapping = app.data_store.get('mapping')
+        ror_ids, funder_ids = sorted(set(mapping.values())), sorted(mapping)
+
+        levels, views = [], []
+        for sessions in session_counts:
+            if not args.warm_caches:
+                reset_caches()
+            results, elapsed = run_level(app, sessions, view_names, args.page_loads, args.think_time,
+                                         args.seed, ror_ids, funder_ids, args.bulk_size)
+            levels.append(summarize(results, elapsed, sessions, rss_mb()))
+            views.extend(summarize_views(results, sessions))
+            print(f"{sessions} sessions: {levels[-1]['Throughput (/s)']} page loads/s, p99 {levels[-1]['p99 (ms)']} ms")
+            for error, count in results['Error'].value_counts().items():
+                print(f'  {count} x {error}')
+
+        print()
+        print(pd.DataFrame(levels).to_string(index=False))
+        print()
+        print(pd.DataFrame(views).to_string(index=False))
+        if output:
+            pd.DataFrame(views).merge(pd.DataFrame(levels)[['Sessions', 'Throughput (/s)', 'RSS (MB)']],
+                                      on='Sessions').to_csv(output, index=False)
+    finally:
+        stand_in.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,44 @@
 import streamlit as st
+import data_store
+import singleflight
+import jobs
 from views.member_view import member_view
 from views.aggregrate_view_Crossref import Crossref_view
 from views.aggregrate_view_DataCite import DataCite_view
+from views.datacite_repository_view import datacite_repository_view
 from views.funder_lookup_view import funder_lookup_view
+from views.bulk_lookup_view import bulk_lookup_view
+from views.ror_lookup_view import ror_lookup_view
+from views.combined_overlap_view import combined_overlap_view
+from views.unmapped_ranking_panel import source_unmapped_ranking
 
 views = {
     "Funder Mapping": funder_lookup_view,
+    "Funder Mapping - Bulk": bulk_lookup_view,
+    "Funder Mapping - By ROR organization": ror_lookup_view,
     "Crossref - Overlap by member": member_view,
     "Crossref - Aggregrate overlap": Crossref_view,
-    "DataCite - Aggregrate overlap": DataCite_view
+    "DataCite - Overlap by repository": datacite_repository_view,
+    "DataCite - Aggregrate overlap": DataCite_view,
+    "Crossref + DataCite - Combined overlap": combined_overlap_view
 }
 
+# Shown until data/manifest.json records the versions of a refresh
 funder_registry_version = '1.60'
 ror_registry_version = '1.70'
 works_count_date = '2025/03/16'
 
+@st.cache_resource(show_spinner=False)
+def warm_data_store():
+    # Runs once per process; every session then reads the same shared snapshot
+    data_store.warm()
+    for source in ('crossref', 'datacite'):
+        source_unmapped_ranking(source)
+
+
 def main():
+    warm_data_store()
+    data_store.poll_manifest()
     sidebar_title = st.sidebar.title("Views")
 
     state = st.session_state
@@ -27,9 +50,16 @@ def main():
     views[state['current_view']]()
 
     st.sidebar.markdown('---')
-    st.sidebar.markdown(f'**Funder Registry version:** {funder_registry_version}')
-    st.sidebar.markdown(f'**ROR version:** {ror_registry_version}')
-    st.sidebar.markdown(f'**Last refresh date:** {works_count_date}')
+    versions = data_store.manifest_versions()
+    st.sidebar.markdown(f"**Funder Registry version:** {versions.get('funder_registry_version', funder_registry_version)}")
+    st.sidebar.markdown(f"**ROR version:** {versions.get('ror_registry_version', ror_registry_version)}")
+    st.sidebar.markdown(f"**Last refresh date:** {versions.get('works_count_date', works_count_date)}")
+    with st.sidebar.expander('Memory usage'):
+        st.table(data_store.memory_report())
+    with st.sidebar.expander('Upstream lookups'):
+        st.table(singleflight.metrics_report())
+    with st.sidebar.expander('Background jobs'):
+        st.table(jobs.metrics_report())
 
 
 if __name__ == '__main__':
@@ -0,0 +1,122 @@
+import pandas as pd
+
+
+def find_overlap(funders, equivalents):
+    return funders.keys() & equivalents.keys()
+
+
+def overlap_analysis(overlap, funders):
+    total_funders, overlapping_funders = len(funders), len(overlap)
+    overlapping_funders_percentage = (
+        overlapping_funders / total_funders) * 100 if total_funders else 0
+    non_overlapping_funders_percentage = 100 - overlapping_funders_percentage
+
+    total_assertions = sum(funders.values())
+    overlapping_assertions = sum(funders[funder_id] for funder_id in overlap)
+    overlapping_assertions_percentage = (
+        overlapping_assertions / total_assertions) * 100 if total_assertions else 0
+    non_overlapping_assertions_percentage = 100 - overlapping_assertions_percentage
+    return {
+        'overlapping_funders_percentage': overlapping_funders_percentage,
+        'non_overlapping_funders_percentage': non_overlapping_funders_percentage,
+        'overlapping_assertions_percentage': overlapping_assertions_percentage,
+        'non_overlapping_assertions_percentage': non_overlapping_assertions_percentage,
+        'total_funders': total_funders,
+        'overlapping_funders': overlapping_funders,
+        'total_assertions': total_assertions,
+        'overlapping_assertions': overlapping_assertions
+    }
+
+
+def roll_up_counts(funders, closure):
+    """Total assertions per funder including every sub-unit beneath it."""
+    counts = pd.Series(funders, name='count', dtype='int64')
+    rows = closure.merge(counts, left_on='funder_id', right_index=True)
+    return rows.groupby('ancestor_id')['count'].sum()
+
+
+def top_rolled_up(funders, equivalents, closure, limit=25):
+    """Mapped funders ranked by their own assertions plus those of every sub-unit beneath them."""
+    rolled_up = roll_up_counts(funders, closure)
+    rolled_up = rolled_up[rolled_up.index.isin(equivalents.keys())].sort_values(ascending=False, kind='stable').head(limit)
+    return pd.DataFrame({
+        'Funder ID': 'http://dx.doi.org/10.13039/' + rolled_up.index,
+        'ROR ID': [equivalents[funder_id] for funder_id in rolled_up.index],
+        'Own Count': [funders.get(funder_id, 0) for funder_id in rolled_up.index],
+        'Rolled-up Count': rolled_up.values,
+    })
+
+
+def hierarchical_overlap(funders, equivalents, closure):
+    """Funder IDs that are mapped themselves or sit beneath a mapped ancestor."""
+    rows = closure[closure['funder_id'].isin(funders.keys())]
+    covered = rows.loc[rows['ancestor_id'].isin(equivalents.keys()), 'funder_id']
+    return set(covered.unique()) | find_overlap(funders, equivalents)
+
+
+def build_ror_index(mapping, ror_names=None):
+    """Invert the funder -> ROR mapping into ROR ID -> organization name and funder IDs."""
+    ror_names = ror_names or {}
+    index = {}
+    for funder_id, ror_id in mapping.items():
+        entry = index.setdefault(ror_id, {'name': ror_names.get(ror_id), 'funder_ids': []})
+        entry['funder_ids'].append(funder_id)
+    for entry in index.values():
+        entry['funder_ids'].sort()
+    return index
+
+
+def ror_index_counts(entry, crossref_counts, datacite_counts):
+    """Assertion counts for an index entry, summed over its funder IDs from the current counts."""
+    return {'crossref_count': sum(crossref_counts.get(funder_id, 0) for funder_id in entry['funder_ids']),
+            'datacite_count': sum(datacite_counts.get(funder_id, 0) for funder_id in entry['funder_ids'])}
+
+
+def combined_funder_table(mapping, crossref_counts, datacite_counts):
+    """One row per funder with assertions in either source: both counts, their total and the funder's ROR mapping."""
+    if not isinstance(mapping, pd.Series):
+        mapping = pd.Series(dict(mapping), dtype=object)
+    crossref = pd.Series(dict(crossref_counts), name='Crossref Count', dtype='int64')
+    datacite = pd.Series(dict(datacite_counts), name='DataCite Count', dtype='int64')
+    counts = crossref.to_frame().join(datacite, how='outer').fillna(0).astype('int64')
+    # Funders listed with zero works in both sources have no assertions to report
+    counts = counts[(counts['Crossref Count'] + counts['DataCite Count']) > 0]
+    ror_ids = mapping.reindex(counts.index)
+    table = pd.DataFrame({
+        'Funder ID': 'http://dx.doi.org/10.13039/' + counts.index,
+        'Crossref Count': counts['Crossref Count'].values,
+        'DataCite Count': counts['DataCite Count'].values,
+        'Total': (counts['Crossref Count'] + counts['DataCite Count']).values,
+        'Mapped': ror_ids.notna().values,
+        'ROR ID': ror_ids.values,
+    })
+    return table.sort_values('Total', ascending=False, kind='stable', ignore_index=True)
+
+
+def rank_unmapped(funders, overlap):
+    """Unmapped funders by descending assertion count, with the coverage reached by mapping each prefix of the list."""
+    unmapped_ids = [funder_id for funder_id in funders if funder_id not in overlap]
+    # An object index even when empty, so prefixing the IDs below still works once every funder is mapped
+    unmapped = pd.Series([funders[funder_id] for funder_id in unmapped_ids],
+                         index=pd.Index(unmapped_ids, dtype=object), name='Count', dtype='int64')
+    unmapped = unmapped.sort_values(ascending=False, kind='stable')
+    total_assertions = sum(funders.values())
+    mapped_assertions = total_assertions - int(unmapped.sum())
+    cumulative = unmapped.cumsum()
+    ranking = pd.DataFrame({
+        'Funder ID': 'http://dx.doi.org/10.13039/' + unmapped.index,
+        'Count': unmapped.values,
+        'Cumulative Count': cumulative.values,
+        'Coverage %': (mapped_assertions + cumulative.values) / total_assertions * 100 if total_assertions else 0.0,
+    })
+    ranking.index = pd.RangeIndex(1, len(ranking) + 1, name='Rank')
+    ranking.attrs.update(total_assertions=total_assertions, mapped_assertions=mapped_assertions)
+    return ranking
+
+
+def coverage_if_top_mapped(ranking, k):
+    """Assertion coverage (%) if the top k unmapped funders in the ranking were mapped."""
+    if k <= 0 or ranking.empty:
+        total_assertions = ranking.attrs['total_assertions']
+        return ranking.attrs['mapped_assertions'] / total_assertions * 100 if total_assertions else 0.0
+    return float(ranking['Coverage %'].iloc[min(k, len(ranking)) - 1])
@@ -0,0 +1,178 @@
+import re
+import json
+import time
+import hashlib
+import threading
+from urllib.parse import unquote
+from cachetools import LRUCache
+import data_store
+from overlap import find_overlap, hierarchical_overlap, overlap_analysis, top_rolled_up
+from bulk_lookup import (FUNDER_DOI_PREFIX, normalize_funder_id,
+                         read_funder_ids, resolve_funder_ids, iter_csv)
+from crossref import count_funders
+
+# Member overlap depends on a live Crossref query, so it expires on its own;
+# everything else is only invalidated when the data store is refreshed.
+MEMBER_OVERLAP_TTL = 3600
+MANIFEST_HEALTH_TTL = 30
+CACHE_CONTROL = 'public, max-age=300'
+ROLLED_UP_LIMIT = 25
+
+_response_cache = LRUCache(maxsize=1024)
+_response_cache_lock = threading.Lock()
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def health():
+    return {'status': 'ok', **data_store.manifest_versions()}
+
+
+def aggregate_overlap(source):
+    if source not in ('crossref', 'datacite'):
+        raise HTTPError('404 Not Found', f'Unknown source: {source}')
+    funders = data_store.get(f'{source}_counts')
+    overlap = find_overlap(funders, data_store.get('mapping'))
+    return {'source': source, 'hierarchical': False, **overlap_analysis(overlap, funders)}
+
+
+def hierarchical_aggregate_overlap(source):
+    if source not in ('crossref', 'datacite'):
+        raise HTTPError('404 Not Found', f'Unknown source: {source}')
+    if not data_store.available('funder_ancestors'):
+        raise HTTPError('503 Service Unavailable', 'The Funder Registry hierarchy has not been loaded')
+    funders = data_store.get(f'{source}_counts')
+    equivalents, closure = data_store.get('mapping'), data_store.get('funder_ancestors')
+    overlap = hierarchical_overlap(funders, equivalents, closure)
+    rolled_up = top_rolled_up(funders, equivalents, closure, ROLLED_UP_LIMIT)
+    return {'source': source, 'hierarchical': True, **overlap_analysis(overlap, funders),
+            'rolled_up': [{'funder_id': row['Funder ID'], 'ror_id': row['ROR ID'],
+                           'own_count': int(row['Own Count']), 'rolled_up_count': int(row['Rolled-up Count'])}
+                          for row in rolled_up.to_dict('records')]}
+
+
+def member_overlap(member_id):
+    funders = count_funders(member_id)
+    if funders is None:
+        raise HTTPError('404 Not Found', f'No funding references found for member {member_id}')
+    equivalents = data_store.get('mapping')
+    overlap = find_overlap(funders, equivalents)
+    return {
+        'member_id': member_id,
+        **overlap_analysis(overlap, funders),
+        'mapped': {f'{FUNDER_DOI_PREFIX}{k}': equivalents[k] for k in overlap},
+        'unmapped': {f'{FUNDER_DOI_PREFIX}{k}': v for k, v in funders.items() if k not in overlap},
+    }
+
+
+def funder_lookup(funder_id):
+    bare_id = normalize_funder_id(unquote(funder_id))
+    if bare_id is None:
+        raise HTTPError('400 Bad Request', f'Not a Funder ID: {funder_id}')
+    ror_id = data_store.get('mapping').get(bare_id)
+    return {'funder_id': f'{FUNDER_DOI_PREFIX}{bare_id}', 'ror_id': ror_id, 'mapped': ror_id is not None}
+
+
+def organization_lookup(ror_id):
+    entry = data_store.get('ror_index').get(f'https://ror.org/{ror_id.lower()}')
+    if entry is None:
+        raise HTTPError('404 Not Found', f'No Funder IDs mapped to ROR ID {ror_id}')
+    return {'ror_id': f'https://ror.org/{ror_id.lower()}', 'name': entry['name'],
+            'funder_ids': [f'{FUNDER_DOI_PREFIX}{funder_id}' for funder_id in entry['funder_ids']],
+            'crossref_count': entry['crossref_count'], 'datacite_count': entry['datacite_count']}
+
+
+# (path pattern, handler, TTL, datasets whose versions invalidate the cached response)
+ROUTES = [
+    (re.compile(r'^/health$'), health, MANIFEST_HEALTH_TTL, ()),
+    (re.compile(r'^/overlap/(?P<source>[a-z]+)$'), aggregate_overlap, None,
+     ('mapping', 'crossref_counts', 'datacite_counts')),
+    (re.compile(r'^/overlap/(?P<source>[a-z]+)/hierarchical$'), hierarchical_aggregate_overlap, None,
+     ('mapping', 'crossref_counts', 'datacite_counts', 'funder_ancestors')),
+    (re.compile(r'^/members/(?P<member_id>\d+)/overlap$'), member_overlap, MEMBER_OVERLAP_TTL,
+     ('mapping', 'member_funder_counts')),
+    (re.compile(r'^/funders/(?P<funder_id>.+)$'), funder_lookup, None, ('mapping',)),
+    (re.compile(r'^/organizations/(?:https?://ror\.org/)?(?P<ror_id>0[a-zA-Z0-9]{8})$'), organization_lookup, None,
+     ('ror_index', 'crossref_counts', 'datacite_counts')),
+]
+
+
+def cached_response(key, build, ttl, datasets):
+    # Only a change to the datasets this response was built from invalidates it
+    # A dataset with no file yet has no version; the handler reports it as unavailable
+    versions = tuple(data_store.version(name) if data_store.available(name) else None for name in datasets)
+    with _response_cache_lock:
+        entry = _response_cache.get(key)
+    if entry and entry['versions'] == versions and (entry['expires'] is None or entry['expires'] > time.time()):
+        return entry
+    body = json.dumps(build()).encode('utf-8')
+    entry = {
+        'versions': versions,
+        'expires': time.time() + ttl if ttl else None,
+        'etag': f'"{hashlib.sha1(body).hexdigest()}"',
+        'body': body,
+    }
+    with _response_cache_lock:
+        _response_cache[key] = entry
+    return entry
+
+
+def json_response(start_response, status, payload):
+    body = json.dumps(payload).encode('utf-8')
+    start_response(status, [('Content-Type', 'application/json'),
+                            ('Content-Length', str(len(body)))])
+    return [body]
+
+
+def bulk_lookup(environ, start_response):
+    length = int(environ.get('CONTENT_LENGTH') or 0)
+    data = environ['wsgi.input'].read(length)
+    resolved = resolve_funder_ids(read_funder_ids(data))
+    start_response('200 OK', [('Content-Type', 'text/csv'),
+                              ('Content-Disposition', 'attachment; filename="funder_ror_mapping.csv"')])
+    return (chunk.encode('utf-8') for chunk in iter_csv(resolved))
+
+
+def app(environ, start_response):
+    data_store.poll_manifest()
+    method = environ['REQUEST_METHOD']
+    path = environ.get('PATH_INFO', '')
+    try:
+        if path == '/funders/bulk':
+            if method != 'POST':
+                raise HTTPError('405 Method Not Allowed', 'Use POST with a CSV or newline-separated list of Funder IDs')
+            return bulk_lookup(environ, start_response)
+        for pattern, handler, ttl, datasets in ROUTES:
+            match = pattern.match(path)
+            if not match:
+                continue
+            if method not in ('GET', 'HEAD'):
+                raise HTTPError('405 Method Not Allowed', f'{method} not allowed on {path}')
+            entry = cached_response(path, lambda: handler(**match.groupdict()), ttl, datasets)
+            headers = [('ETag', entry['etag']), ('Cache-Control', CACHE_CONTROL)]
+            if environ.get('HTTP_IF_NONE_MATCH') == entry['etag']:
+                start_response('304 Not Modified', headers)
+                return []
+            start_response('200 OK', headers + [('Content-Type', 'application/json'),
+                                                ('Content-Length', str(len(entry['body'])))])
+            return [] if method == 'HEAD' else [entry['body']]
+        raise HTTPError('404 Not Found', f'No route for {path}')
+    except HTTPError as e:
+        return json_response(start_response, e.status, {'error': e.message})
+    except TimeoutError as e:
+        return json_response(start_response, '504 Gateway Timeout', {'error': str(e)})
+
+
+data_store.warm()
+
+
+if __name__ == '__main__':
+    from wsgiref.simple_server import make_server
+    with make_server('', 8000, app) as httpd:
+        print('Serving on port 8000...')
+        httpd.serve_forever()
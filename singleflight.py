@@ -0,0 +1,71 @@
+import threading
+from collections import Counter
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Concurrent calls for the same key wait on one upstream call and share its result."""
+
+    def __init__(self, name):
+        self.name = name
+        self.metrics = Counter()
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, timeout=None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.metrics['upstream_calls'] += 1
+            else:
+                self.metrics['coalesced'] += 1
+        if leader:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        elif not call.done.wait(timeout):
+            with self._lock:
+                self.metrics['timeouts'] += 1
+            raise TimeoutError(f'{self.name}: timed out after {timeout}s waiting for {key!r}')
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+_groups = {}
+_groups_lock = threading.Lock()
+
+
+def group(name):
+    with _groups_lock:
+        if name not in _groups:
+            _groups[name] = SingleFlight(name)
+        return _groups[name]
+
+
+def metrics_report():
+    with _groups_lock:
+        groups = list(_groups.values())
+    return [{'Lookup': flight.name,
+             'Upstream calls': flight.metrics['upstream_calls'],
+             'Coalesced': flight.metrics['coalesced'],
+             'Timeouts': flight.metrics['timeouts'],
+             'In flight': flight.in_flight()}
+            for flight in groups]
@@ -0,0 +1,31 @@
+import unittest
+from overlap import rank_unmapped, coverage_if_top_mapped
+
+
+class RankUnmappedTest(unittest.TestCase):
+    def test_ranking(self):
+        ranking = rank_unmapped({'1': 5, '2': 30, '3': 15}, {'1'})
+        self.assertEqual(list(ranking['Funder ID']), ['http://dx.doi.org/10.13039/2', 'http://dx.doi.org/10.13039/3'])
+        self.assertEqual(list(ranking['Cumulative Count']), [30, 45])
+        self.assertEqual(list(ranking.index), [1, 2])
+        self.assertAlmostEqual(coverage_if_top_mapped(ranking, 0), 10.0)
+        self.assertAlmostEqual(coverage_if_top_mapped(ranking, 1), 70.0)
+        self.assertAlmostEqual(coverage_if_top_mapped(ranking, 5), 100.0)
+
+    def test_all_mapped(self):
+        ranking = rank_unmapped({'1': 5, '2': 3}, {'1', '2'})
+        self.assertTrue(ranking.empty)
+        self.assertEqual(list(ranking.columns), ['Funder ID', 'Count', 'Cumulative Count', 'Coverage %'])
+        self.assertEqual(ranking.attrs, {'total_assertions': 8, 'mapped_assertions': 8})
+        self.assertAlmostEqual(coverage_if_top_mapped(ranking, 10), 100.0)
+
+    def test_no_assertions(self):
+        for funders, overlap in (({}, set()), ({'1': 0}, set())):
+            ranking = rank_unmapped(funders, overlap)
+            self.assertEqual(len(ranking), len(funders))
+            self.assertEqual(ranking.attrs, {'total_assertions': 0, 'mapped_assertions': 0})
+            self.assertEqual(coverage_if_top_mapped(ranking, 0), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,16 @@
+import os
+import sys
 import json
+import argparse
 import requests
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from data_store import load_funder_ancestors
+from overlap import hierarchical_overlap, top_rolled_up
+from manifest import update_manifest
+
 
 def load_json(filename):
 	with open(filename, 'r') as file:
@@ -49,18 +57,22 @@ def overlap_analysis(overlap, funders, equivalents):
 	}
 
 
-def load_crossref():
+def load_crossref(equivalents, closure=None):
 	funders = count_funders('data/crossref_funders.json')
-	equivalents = load_json('data/ror_funder_registry_mapping.json')
-	overlap = find_overlap(funders, equivalents)
+	if closure is not None:
+		overlap = hierarchical_overlap(funders, equivalents, closure)
+	else:
+		overlap = find_overlap(funders, equivalents)
 	analysis = overlap_analysis(overlap, funders, equivalents)
 	return analysis
 
 
-def load_datacite():
+def load_datacite(equivalents, closure=None):
 	funders = count_funders('data/datacite_funders.json')
-	equivalents = load_json('data/ror_funder_registry_mapping.json')
-	overlap = find_overlap(funders, equivalents)
+	if closure is not None:
+		overlap = hierarchical_overlap(funders, equivalents, closure)
+	else:
+		overlap = find_overlap(funders, equivalents)
 	analysis = overlap_analysis(overlap, funders, equivalents)
 	return analysis
 
@@ -69,7 +81,7 @@ def save_plot(fig, filename):
 	fig.savefig(filename, dpi=300)
 
 
-def plot_overlap(overlap_data, data_source):
+def plot_overlap(overlap_data, data_source, suffix='overlap'):
 	fig, axs = plt.subplots(1, 2, figsize=(12, 6))
 	mpl.rcParams['font.size'] = 12
 	mpl.rcParams['font.weight'] = 'bold'
@@ -99,15 +111,50 @@ def plot_overlap(overlap_data, data_source):
 	)
 
 	plt.tight_layout()
-	filename = f"{data_source}_overlap.png"
+	filename = f"{data_source}_{suffix}.png"
+	save_plot(fig, filename)
+	update_manifest([filename])
+
+
+def plot_rolled_up(rolled_up, data_source):
+	fig, ax = plt.subplots(figsize=(12, 8))
+	rolled_up = rolled_up.iloc[::-1]
+	labels = rolled_up['Funder ID'].str.replace('http://dx.doi.org/10.13039/', '', regex=False)
+	ax.barh(labels, rolled_up['Rolled-up Count'], color='tab:blue', label='Sub-unit assertions')
+	ax.barh(labels, rolled_up['Own Count'], color='green', label='Own assertions')
+	ax.set_xlabel('Assertions')
+	ax.set_title('Mapped funders by assertions rolled up from their sub-units', fontweight='bold')
+	ax.legend()
+	plt.tight_layout()
+	filename = f"{data_source}_hierarchical_rollup.png"
 	save_plot(fig, filename)
+	update_manifest([filename])
+
+
+def parse_arguments():
+	parser = argparse.ArgumentParser(
+		description='Create aggregate Crossref and DataCite overlap charts')
+	parser.add_argument('--hierarchical', action='store_true',
+						help='Credit funders whose ancestor in the Funder Registry hierarchy is mapped to ROR')
+	parser.add_argument('-c', '--closure', default='data/funder_ancestors.csv',
+						help='Funder ancestor closure table from funder_registry_rdf_to_json.py')
+	return parser.parse_args()
 
 
 def main():
-	crossref_data = load_crossref()
-	plot_overlap(crossref_data, "crossref")
-	datacite_data = load_datacite()
-	plot_overlap(datacite_data, "datacite")
+	args = parse_arguments()
+	closure = load_funder_ancestors(args.closure) if args.hierarchical else None
+	suffix = 'hierarchical_overlap' if args.hierarchical else 'overlap'
+	# Loaded once for both sources
+	equivalents = load_json('data/ror_funder_registry_mapping.json')
+	crossref_data = load_crossref(equivalents, closure)
+	plot_overlap(crossref_data, "crossref", suffix)
+	datacite_data = load_datacite(equivalents, closure)
+	plot_overlap(datacite_data, "datacite", suffix)
+	if closure is not None:
+		for source in ('crossref', 'datacite'):
+			funders = count_funders(f'data/{source}_funders.json')
+			plot_rolled_up(top_rolled_up(funders, equivalents, closure), source)
 
 if __name__ == '__main__':
 	main()
\ No newline at end of file
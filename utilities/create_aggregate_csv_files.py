@@ -1,8 +1,13 @@
+import os
 import sys
 import json
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
-sys.path.append("..")
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from overlap import combined_funder_table
+from manifest import update_manifest
 
 
 def load_json(filename):
@@ -42,16 +47,56 @@ def mapped_to_csv(ror_funder_mapping, overlap, filename):
     return mapped_csv
 
 
-def create_aggregate_csv():
-    equivalents = load_json('data/ror_funder_registry_mapping.json')
-    funders = count_funders(f'data/crossref_funders.json')
+def write_parquet(df, filename, sort_by, statistics):
+    # Sorting on the main filter column keeps row-group min/max ranges tight,
+    # so readers can skip row groups that cannot match a predicate.
+    df = df.sort_values(sort_by, ascending=sort_by not in ('Count', 'Total'), kind='stable', ignore_index=True)
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), filename,
+                   row_group_size=2048, write_statistics=statistics)
+
+
+def unmapped_to_parquet(funders, overlap, filename):
+    unmapped_funders = {f'http://dx.doi.org/10.13039/{k}': v for k, v in funders.items() if k not in overlap}
+    df = pd.DataFrame(list(unmapped_funders.items()),
+                      columns=['Funder ID', 'Count'])
+    write_parquet(df, filename, 'Count', ['Funder ID', 'Count'])
+
+
+def mapped_to_parquet(ror_funder_mapping, funders, overlap, filename):
+    mapped_funders = [(f'http://dx.doi.org/10.13039/{k}', v, funders[k]) for k, v in ror_funder_mapping.items() if k in overlap]
+    df = pd.DataFrame(mapped_funders, columns=['Funder ID', 'ROR ID', 'Count'])
+    write_parquet(df, filename, 'ROR ID', ['Funder ID', 'ROR ID', 'Count'])
+
+
+def create_aggregate_csv(prefix, equivalents, funders):
     overlap = find_overlap(funders, equivalents)
-    unmapped_filename = f'aggregate_unmapped.csv'
+    unmapped_filename = f'{prefix}aggregate_unmapped.csv'
     unmapped_to_csv(funders, overlap, unmapped_filename)
-    mapped_filename = f'aggregate_mapped.csv'
+    unmapped_to_parquet(funders, overlap, f'{prefix}aggregate_unmapped.parquet')
+    mapped_filename = f'{prefix}aggregate_mapped.csv'
     mapped_to_csv(equivalents, overlap, mapped_filename)
+    mapped_to_parquet(equivalents, funders, overlap, f'{prefix}aggregate_mapped.parquet')
+    update_manifest([f'{prefix}aggregate_{table}.{extension}'
+                     for table in ('unmapped', 'mapped') for extension in ('csv', 'parquet')])
 
-if __name__ == '__main__':
-    create_aggregate_csv()
+def create_combined_csv(equivalents, crossref_funders, datacite_funders):
+    table = combined_funder_table(equivalents, crossref_funders, datacite_funders)
+    table.to_csv('combined_aggregate.csv', index=False)
+    write_parquet(table, 'combined_aggregate.parquet', 'Total',
+                  ['Funder ID', 'Crossref Count', 'DataCite Count', 'Total', 'Mapped', 'ROR ID'])
+    update_manifest(['combined_aggregate.csv', 'combined_aggregate.parquet'])
 
 
+def main():
+    # The mapping and each source's counts are loaded once and shared by every table
+    equivalents = load_json('data/ror_funder_registry_mapping.json')
+    crossref_funders = count_funders('data/crossref_funders.json')
+    datacite_funders = count_funders('data/datacite_funders.json')
+    # Crossref keeps the original unprefixed file names
+    create_aggregate_csv('', equivalents, crossref_funders)
+    create_aggregate_csv('datacite_', equivalents, datacite_funders)
+    create_combined_csv(equivalents, crossref_funders, datacite_funders)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,10 @@ import requests
 import zipfile
 import os
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from overlap import build_ror_index
+from manifest import update_manifest
+
 
 def download_and_unzip(record_id, path='.'):
     # Downloading the record from Zenodo
@@ -26,8 +30,18 @@ def download_and_unzip(record_id, path='.'):
     return None
 
 
-def create_mapping_and_output_json(ror_data_file, json_output_file):
+def get_display_name(ror_data):
+    names = ror_data.get('names', [])
+    for name_type in ('ror_display', 'label'):
+        for name in names:
+            if name_type in name.get('types', []):
+                return name.get('value')
+    return names[0].get('value') if names else None
+
+
+def create_mapping_and_output_json(ror_data_file, json_output_file, index_output_file=None):
     mapping = {}
+    ror_names = {}
     with open(ror_data_file, 'r', encoding="utf8") as f_in:
         ror_data_list = json.load(f_in)
     for ror_data in ror_data_list:
@@ -41,8 +55,13 @@ def create_mapping_and_output_json(ror_data_file, json_output_file):
                 funder_ids = list(set(funder_ids))
                 for funder_id in funder_ids:
                     mapping[funder_id] = ror_id
+                ror_names[ror_id] = get_display_name(ror_data)
     with open(json_output_file, 'w') as json_file:
         json.dump(mapping, json_file)
+    if index_output_file:
+        # Names and funder IDs only; the app sums assertion counts from the current count files
+        with open(index_output_file, 'w') as json_file:
+            json.dump(build_ror_index(mapping, ror_names), json_file)
 
 
 def delete_files(prefix):
@@ -63,7 +82,10 @@ if __name__ == "__main__":
     json_file_path = f'{prefix}_schema_v2.json'
     if os.path.exists(json_file_path):
         outfile = 'ror_funder_registry_mapping.json'
-        create_mapping_and_output_json(json_file_path, outfile)
+        # Inverted ROR -> organization name and funder IDs index
+        create_mapping_and_output_json(json_file_path, outfile, 'ror_funder_index.json')
+        # Dump prefixes look like v1.63-2025-04-03-ror-data
+        update_manifest([outfile, 'ror_funder_index.json'], ror_registry_version=prefix.split('-')[0].lstrip('v'))
         delete_files(prefix)
     else:
         print(f"JSON file not found in path: {json_file_path}")
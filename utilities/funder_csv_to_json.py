@@ -1,6 +1,8 @@
 import csv
 import json
 import argparse
+from datetime import date
+from manifest import update_manifest
 
 def to_json(input_file, output_file):
     json_dict = {}
@@ -18,6 +20,7 @@ def main():
     args = parser.parse_args()
 
     to_json(args.input, args.output)
+    update_manifest([args.output], works_count_date=date.today().strftime('%Y/%m/%d'))
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
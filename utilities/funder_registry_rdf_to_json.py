@@ -1,6 +1,8 @@
+import csv
 import json
 import argparse
 from bs4 import BeautifulSoup
+from manifest import update_manifest
 
 
 def convert_records(funder_file):
@@ -20,16 +22,49 @@ def convert_records(funder_file):
                 if not usage_flag:
                     label_text = alt_label.find('skosxl:Label').find('skosxl:literalForm').text
                     aliases.append(label_text)
-            funder = {"id": funder_id, "primary-name": name, "names": aliases}
+            broader = [tag['rdf:resource'] for tag in concept.find_all('skos:broader')]
+            narrower = [tag['rdf:resource'] for tag in concept.find_all('skos:narrower')]
+            funder = {"id": funder_id, "primary-name": name, "names": aliases,
+                      "broader": broader, "narrower": narrower}
             funder_records['funders'].append(funder)
     return funder_records
 
 
+def build_ancestor_closure(funder_records):
+    """Return (funder ID, ancestor ID, depth) rows for every funder, including itself at depth 0."""
+    broader = {funder['id']: funder['broader'] for funder in funder_records['funders']}
+    closure = []
+    for funder_id in broader:
+        depths = {funder_id: 0}
+        frontier = [funder_id]
+        depth = 0
+        while frontier:
+            depth += 1
+            next_frontier = []
+            for child_id in frontier:
+                for parent_id in broader.get(child_id, []):
+                    # The registry has a few cycles; the first visit wins
+                    if parent_id not in depths:
+                        depths[parent_id] = depth
+                        next_frontier.append(parent_id)
+            frontier = next_frontier
+        closure.extend((funder_id, ancestor_id, ancestor_depth)
+                       for ancestor_id, ancestor_depth in depths.items())
+    return closure
+
+
 def save_to_file(funder_records, filename):
     with open(filename, 'w') as file:
         json.dump(funder_records, file, indent=2)
 
 
+def save_closure_to_file(closure, filename):
+    with open(filename, 'w') as file:
+        writer = csv.writer(file)
+        writer.writerow(['Funder ID', 'Ancestor ID', 'Depth'])
+        writer.writerows(closure)
+
+
 def parse_arguments():
     parser = argparse.ArgumentParser(
         description="Parses Funder RDF into JSON file for ID lookup view")
@@ -37,6 +72,10 @@ def parse_arguments():
         "-i", "--input", help="Input log file path", required=True)
     parser.add_argument(
         "-o", "--output", default='funders.json', help="Output file path", required=False)
+    parser.add_argument(
+        "-c", "--closure", default='funder_ancestors.csv', help="Output path for the funder ancestor closure table", required=False)
+    parser.add_argument(
+        "-v", "--version", default=None, help="Funder Registry version, recorded in the data manifest", required=False)
     return parser.parse_args()
 
 
@@ -44,6 +83,8 @@ def main():
     args = parse_arguments()
     funder_records = convert_records(args.input)
     save_to_file(funder_records, args.output)
+    save_closure_to_file(build_ancestor_closure(funder_records), args.closure)
+    update_manifest([args.output, args.closure], funder_registry_version=args.version)
 
 
 if __name__ == '__main__':
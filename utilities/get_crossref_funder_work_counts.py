@@ -7,6 +7,8 @@ import traceback
 import requests
 from functools import wraps
 import os
+from sharding import (parse_shard, select_shard, shard_output_path, manifest_path,
+                      read_counts_csv, write_manifest)
 
 
 def catch_request_exceptions(max_retries=3, delay=30):
@@ -75,6 +77,8 @@ def parse_arguments():
         '-i', '--input', help='Input JSON file', required=True)
     parser.add_argument(
         '-o', '--output', help='Output CSV file', default='crossref_funder_work_counts.csv')
+    parser.add_argument('-s', '--shard', type=parse_shard, default=None,
+                        help='Only retrieve shard i of N (e.g. 2/4); output goes to a per-shard CSV and progress manifest')
     parser.add_argument('-t', '--token', type=str, default='',
                         help='Crossref Metadata Plus API token')
     parser.add_argument('-u', '--user_agent', type=str, default='',
@@ -85,12 +89,24 @@ def parse_arguments():
 def main():
     args = parse_arguments()
     funder_ids = read_input_file(args.input)
-    file_exists = os.path.isfile(args.output)
+    output_file = args.output
+    if args.shard:
+        shard_index, shard_count = args.shard
+        funder_ids = select_shard(funder_ids, shard_index, shard_count)
+        output_file = shard_output_path(args.output, shard_index, shard_count)
+        manifest_file = manifest_path(output_file)
+        shard_total = len(funder_ids)
+        # Resume: skip IDs this shard already has a count for
+        completed_ids = read_counts_csv(output_file)
+        funder_ids = [funder_id for funder_id in funder_ids if funder_id not in completed_ids]
+        completed, failed = shard_total - len(funder_ids), 0
+        print(f'Shard {shard_index}/{shard_count}: {len(funder_ids)} of {shard_total} funders left to retrieve')
+    file_exists = os.path.isfile(output_file)
     if not file_exists:
         write_output_csv(
-            args.output, ['Funder ID', 'Work Count'], write_header=True)
+            output_file, ['Funder ID', 'Work Count'], write_header=True)
 
-    for funder_id in funder_ids:
+    for position, funder_id in enumerate(funder_ids, 1):
         transformed_id = transform_funder_id(funder_id)
         headers = {}
         print(f'Retrieving works for {funder_id}...')
@@ -104,13 +120,24 @@ def main():
             response = query_crossref_api(transformed_id, headers)
             if response != 'Error':
                 work_count = extract_work_count(response)
-                write_output_csv(args.output, [funder_id, work_count])
+                write_output_csv(output_file, [funder_id, work_count])
                 print(f"Successfully retrieved {work_count} works for {funder_id}")
+                succeeded = True
             else:
                 print(f"Failed to retrieve works for {funder_id}")
+                succeeded = False
         except Exception as e:
             print(f"An error occurred while processing {funder_id}: {str(e)}")
             traceback.print_exc()
+            succeeded = False
+
+        if args.shard:
+            completed, failed = completed + succeeded, failed + (not succeeded)
+            if position % 100 == 0:
+                write_manifest(manifest_file, shard_index, shard_count, shard_total, completed, failed)
+
+    if args.shard:
+        write_manifest(manifest_file, shard_index, shard_count, shard_total, completed, failed, finished=True)
 
 
 if __name__ == "__main__":
@@ -1,41 +1,156 @@
-import requests
+import os
+import sys
 import json
+import time
+import argparse
+import requests
+from functools import wraps
+from manifest import update_manifest
+
+MEMBERS_URL = 'https://api.labs.crossref.org/members/'
+# Largest page the REST API serves; cursors expire after five minutes idle
+MAX_ROWS = 1000
+
+
+def catch_request_exceptions(max_retries=3, delay=30):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            retries = 0
+            while retries < max_retries:
+                try:
+                    return func(*args, **kwargs)
+                except requests.exceptions.RequestException as e:
+                    retries += 1
+                    if retries == max_retries:
+                        print(f"All {max_retries} attempts failed.")
+                        return 'Error'
+                    print(f"Request failed. Retrying in {delay} seconds... (Attempt {retries}/{max_retries})")
+                    time.sleep(delay)
+            return 'Error'
+        return wrapper
+    return decorator
+
+
+@catch_request_exceptions()
+def get_page(url, params):
+    response = requests.get(url, params=params, timeout=120)
+    response.raise_for_status()
+    return response.json()
+
 
+def iter_member_pages(url, params):
+    """Yield each page of member records, following the deep-paging cursor.
 
-def get_response(url, params):
-    response = requests.get(url, params=params)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        return None
+    Raises RuntimeError when a page still fails after its retries.
+    """
+    cursor = '*'
+    while cursor:
+        page = get_page(url, {**params, 'cursor': cursor})
+        if page == 'Error':
+            raise RuntimeError(f'Unable to fetch member records (cursor {cursor})')
+        items = page.get('message', {}).get('items', [])
+        if not items:
+            return
+        yield items
+        cursor = page['message'].get('next-cursor')
 
 
-def format_member_records(member_records):
-    if 'message' in member_records and 'items' in member_records['message']:
-        return {'members': member_records['message']['items']}
-    else:
-        return None
+def read_members(filename):
+    if not os.path.isfile(filename):
+        return {}
+    with open(filename, 'r') as file:
+        return {member['id']: member for member in json.load(file)['members']}
 
 
-def save_to_file(member_records, filename):
-    with open(filename, 'w') as file:
-        json.dump(member_records, file, indent=2)
+class MemberWriter:
+    """Streams member records into a temporary file that replaces the output only when closed."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.tmp_file = f'{filename}.tmp'
+        self.file = open(self.tmp_file, 'w')
+        self.file.write('{"members": [\n')
+        self.count = 0
+
+    def write(self, member):
+        if self.count:
+            self.file.write(',\n')
+        json.dump(member, self.file)
+        self.count += 1
+
+    def commit(self):
+        self.file.write('\n]}\n')
+        self.file.close()
+        os.replace(self.tmp_file, self.filename)
+
+    def discard(self):
+        self.file.close()
+        os.remove(self.tmp_file)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description='Retrieve all Crossref members page by page into members.json')
+    parser.add_argument('-o', '--output', default='members.json', help='Output JSON file')
+    parser.add_argument('-r', '--rows', type=int, default=MAX_ROWS,
+                        help=f'Members per page (at most {MAX_ROWS})')
+    parser.add_argument('-m', '--mailto', default='name@email.com',
+                        help='Contact email sent to the API for the polite pool')
+    parser.add_argument('-i', '--incremental', action='store_true',
+                        help='Merge with the existing output: report added, changed and removed members, keep the '
+                             'existing file if nothing changed, and keep unfetched records if a page fails')
+    return parser.parse_args()
 
 
 def main():
-    url = 'https://api.labs.crossref.org/members/'
-    # Add your email here
-    params = {'mailto': 'name@email.com', 'rows': 10000000,
+    args = parse_arguments()
+    params = {'mailto': args.mailto, 'rows': min(args.rows, MAX_ROWS),
               'select': 'id,primary-title,names'}
-    member_records = get_response(url, params)
-    if member_records:
-        formatted_member_records = format_member_records(member_records)
-        if formatted_member_records:
-            save_to_file(formatted_member_records, 'members.json')
-        else:
-            print("Error: No member records found in the API response.")
-    else:
-        print("Error: Unable to fetch member records from the URL.")
+    # The members route has no "updated since" filter, so incremental runs still
+    # page through every member and diff against the previous output
+    existing = read_members(args.output) if args.incremental else {}
+    seen, added, changed = set(), 0, 0
+    writer = MemberWriter(args.output)
+    try:
+        for page_number, items in enumerate(iter_member_pages(MEMBERS_URL, params), 1):
+            for member in items:
+                if member['id'] in seen:
+                    continue
+                seen.add(member['id'])
+                previous = existing.get(member['id'])
+                added += previous is None
+                changed += previous is not None and previous != member
+                writer.write(member)
+            print(f'Page {page_number}: {writer.count} members retrieved')
+    except RuntimeError as e:
+        print(f'Error: {e}')
+        if not (args.incremental and (added or changed)):
+            writer.discard()
+            sys.exit(1)
+        # Keep what this run fetched; members not reached yet keep their previous records
+        for member_id, member in existing.items():
+            if member_id not in seen:
+                writer.write(member)
+        writer.commit()
+        update_manifest([args.output])
+        print(f'Partial update: {added} added, {changed} changed. Rerun to complete.')
+        sys.exit(1)
+
+    if not writer.count:
+        writer.discard()
+        print("Error: No member records found in the API response.")
+        sys.exit(1)
+    removed = len(existing.keys() - seen)
+    if args.incremental and not (added or changed or removed):
+        writer.discard()
+        print(f'No member changes; {args.output} left as is')
+        return
+    writer.commit()
+    update_manifest([args.output])
+    if args.incremental:
+        print(f'{added} added, {changed} changed, {removed} removed')
+    print(f'Wrote {writer.count} members to {args.output}')
 
 
 if __name__ == "__main__":
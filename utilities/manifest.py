@@ -0,0 +1,75 @@
+import os
+import json
+import hashlib
+import argparse
+from datetime import datetime, timezone
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def file_sha256(filename):
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def update_manifest(paths, **versions):
+    """Record content hashes for freshly written artifacts in the manifest.json beside them.
+
+    The app polls this file and reloads only the artifacts whose hash changed,
+    so call it after each output is completely written.
+    """
+    by_directory = {}
+    for path in paths:
+        by_directory.setdefault(os.path.dirname(os.path.abspath(path)), []).append(path)
+    for directory, directory_paths in by_directory.items():
+        manifest_file = os.path.join(directory, MANIFEST_NAME)
+        manifest = {'artifacts': {}}
+        if os.path.isfile(manifest_file):
+            with open(manifest_file, 'r') as file:
+                manifest = json.load(file)
+        now = datetime.now(timezone.utc).isoformat()
+        for path in directory_paths:
+            manifest['artifacts'][os.path.basename(path)] = {
+                'sha256': file_sha256(path),
+                'size': os.path.getsize(path),
+                'updated': now,
+            }
+        manifest.update({key: value for key, value in versions.items() if value})
+        manifest['updated'] = now
+        # Written aside and renamed so a polling app never reads a partial manifest
+        tmp_file = f'{manifest_file}.tmp'
+        with open(tmp_file, 'w') as file:
+            json.dump(manifest, file, indent=2, sort_keys=True)
+        os.replace(tmp_file, manifest_file)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description='Write content hashes and registry versions for data files to manifest.json')
+    parser.add_argument('-d', '--directory', default='../data',
+                        help='Directory holding the data files')
+    parser.add_argument('--funder-registry-version', default=None,
+                        help='Funder Registry version the data was built from')
+    parser.add_argument('--ror-registry-version', default=None,
+                        help='ROR data dump version the mapping was built from')
+    parser.add_argument('--works-count-date', default=None,
+                        help='Date the work counts were retrieved (YYYY/MM/DD)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    paths = [os.path.join(args.directory, name) for name in sorted(os.listdir(args.directory))
+             if name != MANIFEST_NAME and not name.endswith('.tmp')
+             and os.path.isfile(os.path.join(args.directory, name))]
+    update_manifest(paths, funder_registry_version=args.funder_registry_version,
+                    ror_registry_version=args.ror_registry_version,
+                    works_count_date=args.works_count_date)
+    print(f'Manifest updated for {len(paths)} files in {args.directory}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import sys
+import csv
+import json
+import argparse
+from datetime import date
+from manifest import update_manifest
+from sharding import (shard_output_path, manifest_path, read_counts_csv,
+                      read_manifest, select_shard)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description='Validate and merge sharded funder work count CSVs into the canonical CSV and JSON')
+    parser.add_argument(
+        '-i', '--input', help='Input JSON file with funder IDs that was sharded', required=True)
+    parser.add_argument(
+        '-o', '--output', help='Output CSV file passed to the harvest script (shard files are derived from it)', required=True)
+    parser.add_argument(
+        '-n', '--shards', type=int, help='Number of shards (N in --shard i/N)', required=True)
+    parser.add_argument(
+        '-j', '--json', help='Output JSON file with {funder ID: count}', default=None)
+    parser.add_argument(
+        '--allow-missing', action='store_true', help='Write the merged output even if some funder IDs have no count')
+    return parser.parse_args()
+
+
+def read_input_file(input_file):
+    with open(input_file, 'r') as file:
+        funders = json.load(file)
+    return [funder['id'] for funder in funders['funders']]
+
+
+def merge_shards(funder_ids, output_file, shard_count):
+    merged, problems = {}, []
+    for shard_index in range(1, shard_count + 1):
+        shard_file = shard_output_path(output_file, shard_index, shard_count)
+        manifest = read_manifest(manifest_path(shard_file))
+        if manifest is None:
+            problems.append(f'Shard {shard_index}/{shard_count}: no manifest at {manifest_path(shard_file)}')
+        elif not manifest.get('finished'):
+            problems.append(f'Shard {shard_index}/{shard_count}: not finished ({manifest["completed"]}/{manifest["total"]})')
+        expected = set(select_shard(funder_ids, shard_index, shard_count))
+        for funder_id, count in read_counts_csv(shard_file).items():
+            if funder_id not in expected:
+                problems.append(f'Shard {shard_index}/{shard_count}: unexpected funder ID {funder_id}')
+                continue
+            merged[funder_id] = max(count, merged.get(funder_id, 0))
+    missing = [funder_id for funder_id in funder_ids if funder_id not in merged]
+    return merged, missing, problems
+
+
+def write_merged_csv(output_file, funder_ids, merged):
+    # Same layout as the deduplicated counts in data/: no header, input order
+    with open(output_file, 'w') as file:
+        writer = csv.writer(file)
+        writer.writerows([funder_id, merged[funder_id]] for funder_id in funder_ids if funder_id in merged)
+
+
+def write_merged_json(json_file, funder_ids, merged):
+    with open(json_file, 'w') as file:
+        json.dump({funder_id: merged[funder_id] for funder_id in funder_ids if funder_id in merged}, file)
+
+
+def main():
+    args = parse_arguments()
+    funder_ids = read_input_file(args.input)
+    merged, missing, problems = merge_shards(funder_ids, args.output, args.shards)
+    for problem in problems:
+        print(problem)
+    print(f'Merged {len(merged)} of {len(funder_ids)} funder IDs; {len(missing)} missing')
+    if missing and not args.allow_missing:
+        print('Refusing to write incomplete output; rerun the affected shards or pass --allow-missing')
+        sys.exit(1)
+    write_merged_csv(args.output, funder_ids, merged)
+    if args.json:
+        write_merged_json(args.json, funder_ids, merged)
+    update_manifest([path for path in (args.output, args.json) if path],
+                    works_count_date=date.today().strftime('%Y/%m/%d'))
+    print(f'Merge complete. Output file: {args.output}')
+
+
+if __name__ == '__main__':
+    main()
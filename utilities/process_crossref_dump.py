@@ -0,0 +1,138 @@
+import os
+import csv
+import gzip
+import json
+import glob
+import time
+import argparse
+from collections import Counter
+from datetime import date
+from multiprocessing import Pool
+from manifest import update_manifest
+
+FUNDER_DOI_PREFIX = '10.13039/'
+FUNDER_ID_PREFIX = 'http://dx.doi.org/10.13039/'
+
+
+def find_shards(input_dir):
+    return sorted(glob.glob(os.path.join(input_dir, '**', '*.json.gz'), recursive=True)
+                  + glob.glob(os.path.join(input_dir, '**', '*.jsonl.gz'), recursive=True))
+
+
+def iter_works(shard_file):
+    # Public data file shards are {"items": [...]}; newer snapshots ship one work per line
+    with gzip.open(shard_file, 'rt', encoding='utf-8') as file:
+        if shard_file.endswith('.jsonl.gz'):
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(file).get('items', [])
+
+
+def work_funder_ids(work):
+    funder_ids = set()
+    for funder in work.get('funder', []):
+        doi = (funder.get('DOI') or '').lower()
+        if doi.startswith(FUNDER_DOI_PREFIX):
+            funder_ids.add(doi[len(FUNDER_DOI_PREFIX):])
+    return funder_ids
+
+
+def count_shard(shard_file):
+    """Works per Funder ID, overall and per (member ID, Funder ID), for one shard.
+
+    A work naming the same funder more than once is counted once, as the
+    API's funder filter does.
+    """
+    funder_counts, member_funder_counts = Counter(), Counter()
+    works = 0
+    for work in iter_works(shard_file):
+        works += 1
+        funder_ids = work_funder_ids(work)
+        if not funder_ids:
+            continue
+        funder_counts.update(funder_ids)
+        member_id = work.get('member')
+        if member_id:
+            member_funder_counts.update((int(member_id), funder_id) for funder_id in funder_ids)
+    return shard_file, works, funder_counts, member_funder_counts
+
+
+def process_shards(shard_files, processes):
+    funder_counts, member_funder_counts = Counter(), Counter()
+    works = 0
+    start = time.time()
+    with Pool(processes) as pool:
+        # One shard per task: shards are similar in size and each result is merged as it arrives
+        for position, (shard_file, shard_works, shard_funders, shard_members) in enumerate(
+                pool.imap_unordered(count_shard, shard_files), 1):
+            works += shard_works
+            funder_counts.update(shard_funders)
+            member_funder_counts.update(shard_members)
+            if position % 100 == 0 or position == len(shard_files):
+                elapsed = time.time() - start
+                print(f'{position}/{len(shard_files)} shards, {works} works ({works / elapsed:.0f} works/s)')
+    return works, funder_counts, member_funder_counts
+
+
+def write_counts_csv(output_file, funder_counts):
+    # Same layout as crossref_funder_work_counts.csv: no header, prefixed Funder IDs
+    with open(output_file, 'w') as file:
+        writer = csv.writer(file)
+        writer.writerows([f'{FUNDER_ID_PREFIX}{funder_id}', count]
+                         for funder_id, count in sorted(funder_counts.items()))
+
+
+def write_counts_json(json_file, funder_counts):
+    with open(json_file, 'w') as file:
+        json.dump({f'{FUNDER_ID_PREFIX}{funder_id}': count
+                   for funder_id, count in sorted(funder_counts.items())}, file)
+
+
+def write_member_counts_csv(member_file, member_funder_counts):
+    # Sorted by member so the app can slice one member's rows without an index
+    with open(member_file, 'w') as file:
+        writer = csv.writer(file)
+        writer.writerow(['Member ID', 'Funder ID', 'Work Count'])
+        writer.writerows([member_id, f'{FUNDER_ID_PREFIX}{funder_id}', count]
+                         for (member_id, funder_id), count in sorted(member_funder_counts.items()))
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description='Count works per funder, overall and per member, from a local Crossref public data file')
+    parser.add_argument('-i', '--input', required=True,
+                        help='Directory holding the .json.gz (or .jsonl.gz) shards')
+    parser.add_argument('-o', '--output', default='crossref_funder_work_counts.csv',
+                        help='Output CSV file with Funder ID, work count')
+    parser.add_argument('-j', '--json', default='crossref_funders.json',
+                        help='Output JSON file with {funder ID: count}')
+    parser.add_argument('-m', '--members', default='crossref_member_funders.csv',
+                        help='Output CSV file with member ID, Funder ID, work count')
+    parser.add_argument('-p', '--processes', type=int, default=os.cpu_count(),
+                        help='Worker processes (default: one per core)')
+    parser.add_argument('-d', '--dump-date', default=None,
+                        help='Date of the public data file (YYYY/MM/DD), recorded as the works count date')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    shard_files = find_shards(args.input)
+    if not shard_files:
+        print(f'Error: No .json.gz or .jsonl.gz shards found in {args.input}')
+        return
+    print(f'Processing {len(shard_files)} shards with {args.processes} processes')
+    works, funder_counts, member_funder_counts = process_shards(shard_files, args.processes)
+    print(f'{works} works, {len(funder_counts)} funders, {len(member_funder_counts)} member/funder pairs')
+    write_counts_csv(args.output, funder_counts)
+    write_counts_json(args.json, funder_counts)
+    write_member_counts_csv(args.members, member_funder_counts)
+    update_manifest([args.output, args.json, args.members],
+                    works_count_date=args.dump_date or date.today().strftime('%Y/%m/%d'))
+    print(f'Output files: {args.output}, {args.json}, {args.members}')
+
+
+if __name__ == '__main__':
+    main()
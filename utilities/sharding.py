@@ -0,0 +1,71 @@
+import os
+import csv
+import json
+import zlib
+import argparse
+from datetime import datetime, timezone
+
+
+def parse_shard(value):
+    """argparse type for --shard i/N, where shards are numbered 1..N."""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Shard must look like i/N, got '{value}'")
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"Shard index must be between 1 and N, got '{value}'")
+    return index, count
+
+
+def shard_of(funder_id, shard_count):
+    # crc32 rather than hash(): stable across processes, hosts and Python versions
+    return zlib.crc32(funder_id.encode('utf-8')) % shard_count + 1
+
+
+def select_shard(funder_ids, shard_index, shard_count):
+    return [funder_id for funder_id in funder_ids if shard_of(funder_id, shard_count) == shard_index]
+
+
+def shard_output_path(output_file, shard_index, shard_count):
+    stem, extension = os.path.splitext(output_file)
+    return f'{stem}.shard-{shard_index}-of-{shard_count}{extension}'
+
+
+def manifest_path(shard_output_file):
+    return f'{os.path.splitext(shard_output_file)[0]}.manifest.json'
+
+
+def read_counts_csv(csv_file):
+    """Read a work counts CSV into {funder ID: count}, skipping the header and failed lookups."""
+    counts = {}
+    if not os.path.isfile(csv_file):
+        return counts
+    with open(csv_file, 'r') as file:
+        for row in csv.reader(file):
+            if len(row) < 2 or row[0] == 'Funder ID' or not row[1].isdigit():
+                continue
+            counts[row[0]] = max(int(row[1]), counts.get(row[0], 0))
+    return counts
+
+
+def read_manifest(manifest_file):
+    if not os.path.isfile(manifest_file):
+        return None
+    with open(manifest_file, 'r') as file:
+        return json.load(file)
+
+
+def write_manifest(manifest_file, shard_index, shard_count, total, completed, failed, finished=False):
+    manifest = read_manifest(manifest_file) or {'started': datetime.now(timezone.utc).isoformat()}
+    manifest.update({
+        'shard': f'{shard_index}/{shard_count}',
+        'total': total,
+        'completed': completed,
+        'failed': failed,
+        'finished': finished,
+        'updated': datetime.now(timezone.utc).isoformat(),
+    })
+    tmp_file = f'{manifest_file}.tmp'
+    with open(tmp_file, 'w') as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(tmp_file, manifest_file)
@@ -0,0 +1,62 @@
+import os
+import sys
+import gzip
+import json
+import tempfile
+import unittest
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from process_crossref_dump import find_shards, count_shard, process_shards
+
+
+def funder(funder_id):
+    return {'DOI': f'10.13039/{funder_id}', 'name': f'Funder {funder_id}'}
+
+
+# Two shard layouts: {"items": [...]} and one work per line
+ITEMS_WORKS = [
+    # Same funder named twice counts once
+    {'member': '78', 'funder': [funder('100000001'), funder('100000001'), funder('501100000780')]},
+    {'member': '78', 'funder': [funder('100000001')]},
+    {'member': '311', 'funder': [{'name': 'Funder without a DOI'}]},
+]
+LINE_WORKS = [
+    {'member': '311', 'funder': [funder('100000001'), {'DOI': '10.13039/100000002'.upper()}]},
+    {'member': '311'},
+    {'funder': [funder('501100000780')]},
+]
+
+
+class ProcessCrossrefDumpTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.items_shard = os.path.join(self.tmp_dir.name, '0.json.gz')
+        with gzip.open(self.items_shard, 'wt', encoding='utf-8') as file:
+            json.dump({'items': ITEMS_WORKS}, file)
+        os.mkdir(os.path.join(self.tmp_dir.name, 'part'))
+        self.line_shard = os.path.join(self.tmp_dir.name, 'part', '1.jsonl.gz')
+        with gzip.open(self.line_shard, 'wt', encoding='utf-8') as file:
+            file.write('\n'.join(json.dumps(work) for work in LINE_WORKS) + '\n\n')
+
+    def test_find_shards(self):
+        self.assertEqual(find_shards(self.tmp_dir.name), [self.items_shard, self.line_shard])
+
+    def test_count_shard(self):
+        shard_file, works, funder_counts, member_funder_counts = count_shard(self.items_shard)
+        self.assertEqual(shard_file, self.items_shard)
+        self.assertEqual(works, 3)
+        self.assertEqual(funder_counts, Counter({'100000001': 2, '501100000780': 1}))
+        self.assertEqual(member_funder_counts, Counter({(78, '100000001'): 2, (78, '501100000780'): 1}))
+
+    def test_process_shards(self):
+        works, funder_counts, member_funder_counts = process_shards(find_shards(self.tmp_dir.name), 2)
+        self.assertEqual(works, 6)
+        self.assertEqual(funder_counts, Counter({'100000001': 3, '501100000780': 2, '100000002': 1}))
+        self.assertEqual(member_funder_counts, Counter({(78, '100000001'): 2, (78, '501100000780'): 1,
+                                                        (311, '100000001'): 1, (311, '100000002'): 1}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+import streamlit as st
+from aggregate_tables import DOWNLOAD_FORMATS, aggregate_download
+from bulk_lookup import normalize_ror_id
+
+
+def aggregate_download_panel(source):
+    with st.expander('Filter downloads'):
+        col1, col2, col3 = st.columns(3)
+        min_count = col1.number_input('Minimum assertion count', min_value=0, value=0, step=1, key=f'{source}_min_count')
+        id_prefix = col2.text_input('Funder ID prefix', key=f'{source}_id_prefix')
+        ror_id_input = col3.text_input('Mapped ROR ID', key=f'{source}_ror_id')
+        file_format = st.radio('Format', list(DOWNLOAD_FORMATS), horizontal=True, key=f'{source}_format')
+        ror_id = normalize_ror_id(ror_id_input) if ror_id_input.strip() else None
+        if ror_id_input.strip() and ror_id is None:
+            st.warning(f'"{ror_id_input}" is not a ROR ID; the ROR ID filter was not applied.')
+
+    extension, mime = DOWNLOAD_FORMATS[file_format]
+    col1, col2 = st.columns(2)
+    for column, table, table_ror_id in ((col1, 'unmapped', None), (col2, 'mapped', ror_id)):
+        data, rows, unapplied = aggregate_download(source, table, file_format, int(min_count), id_prefix.strip(), table_ror_id)
+        if unapplied:
+            column.warning(f"The {table} table has no {', '.join(unapplied)} column; that filter was not applied.")
+        column.download_button(
+            label=f"Download {table} funders as {file_format} ({format(rows, ',d')} rows)",
+            data=data,
+            file_name=f"{source}_aggregate_{table}.{extension}",
+            mime=mime,
+            key=f'{source}_{table}',
+        )
@@ -0,0 +1,29 @@
+import streamlit as st
+from bulk_lookup import read_funder_ids, resolve_funder_ids, iter_csv
+
+
+def bulk_lookup_view():
+    st.title("Bulk Funder Mapping Lookup")
+    uploaded_file = st.file_uploader('Upload a CSV or newline-separated list of Funder IDs:', type=['csv', 'txt'])
+    pasted_ids = st.text_area('Or paste Funder IDs, one per line:')
+    submit = st.button("Resolve")
+
+    if submit and (uploaded_file or pasted_ids):
+        with st.spinner('Resolving...'):
+            data = uploaded_file.getvalue() if uploaded_file else pasted_ids
+            resolved = resolve_funder_ids(read_funder_ids(data))
+            resolved_csv = ''.join(iter_csv(resolved))
+        total_ids, mapped_ids = len(resolved), int(resolved['Mapped'].sum())
+        invalid_ids = int(resolved['Funder ID'].isna().sum())
+        st.markdown(f"**{format(mapped_ids, ',d')} / {format(total_ids, ',d')} Funder IDs mapped to ROR IDs**")
+        if invalid_ids:
+            st.markdown(f"{format(invalid_ids, ',d')} entries could not be read as Funder IDs.")
+        st.dataframe(resolved.head(100))
+        st.download_button(
+            label="Download results as CSV",
+            data=resolved_csv,
+            file_name="funder_ror_mapping.csv",
+            mime="text/csv",
+        )
+    elif submit:
+        st.write(f"**Please upload or paste Funder IDs.**")
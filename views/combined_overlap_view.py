@@ -0,0 +1,55 @@
+import math
+import streamlit as st
+import data_store
+from aggregate_tables import SOURCE_FILTERS, combined_slice, to_parquet_bytes
+
+PAGE_SIZE = 25
+MAPPED_OPTIONS = {'Unmapped': False, 'Mapped': True, 'All': None}
+
+
+def combined_summary(table):
+    mapped = table['Mapped']
+    lines = []
+    for label, column in (('Crossref', 'Crossref Count'), ('DataCite', 'DataCite Count'), ('Combined', 'Total')):
+        used = table[column] > 0
+        total_assertions = int(table.loc[used, column].sum())
+        mapped_assertions = int(table.loc[used & mapped, column].sum())
+        coverage = mapped_assertions / total_assertions * 100 if total_assertions else 0
+        lines.append(f"**{label}:** {format(int((used & mapped).sum()), ',d')} / {format(int(used.sum()), ',d')} funders with assertions mapped, "
+                     f"{format(mapped_assertions, ',d')} / {format(total_assertions, ',d')} assertions ({coverage:.2f}%)")
+    return '\n\n'.join(lines)
+
+
+def combined_overlap_view():
+    st.title("Crossref + DataCite - Combined ROR/Funder Registry Overlap")
+    table = data_store.get('combined_funders')
+    st.markdown(combined_summary(table))
+
+    col1, col2 = st.columns(2)
+    status = col1.radio('Funders:', list(MAPPED_OPTIONS), horizontal=True, key='combined_status')
+    sources = col2.radio('With assertions in:', list(SOURCE_FILTERS), horizontal=True, key='combined_sources')
+    col1, col2 = st.columns(2)
+    min_total = col1.number_input('Minimum combined assertion count', min_value=0, value=0, step=1, key='combined_min_total')
+    id_prefix = col2.text_input('Funder ID prefix', key='combined_id_prefix')
+
+    rows = combined_slice(table, MAPPED_OPTIONS[status], sources, min_total, id_prefix)
+    st.markdown(f"**{format(len(rows), ',d')}** funders, **{format(int(rows['Total'].sum()), ',d')}** combined assertions")
+    if rows.empty:
+        return
+    pages = math.ceil(len(rows) / PAGE_SIZE)
+    page = st.number_input(f'Page (of {format(pages, ",d")}):', min_value=1, max_value=pages,
+                           value=1, step=1, key='combined_page')
+    start = (int(page) - 1) * PAGE_SIZE
+    st.dataframe(rows.iloc[start:start + PAGE_SIZE], use_container_width=True, hide_index=True)
+
+    file_format = st.radio('Format', ['CSV', 'Parquet'], horizontal=True, key='combined_format')
+    if file_format == 'Parquet':
+        extension, mime, data = 'parquet', 'application/octet-stream', to_parquet_bytes(rows)
+    else:
+        extension, mime, data = 'csv', 'text/csv', rows.to_csv(index=False)
+    st.download_button(
+        label=f"Download as {file_format} ({format(len(rows), ',d')} rows)",
+        data=data,
+        file_name=f"combined_{status.lower()}_funders.{extension}",
+        mime=mime,
+    )
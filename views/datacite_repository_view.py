@@ -0,0 +1,113 @@
+import threading
+from types import MappingProxyType
+import requests
+import streamlit as st
+from cachetools import TTLCache
+import data_store
+import singleflight
+from bulk_lookup import normalize_funder_id
+from config import DATACITE_API_URL
+from overlap import find_overlap
+from views.member_view import overlap_chart_png, counts_version, unmapped_to_csv, mapped_to_csv
+from views.unmapped_ranking_panel import unmapped_ranking, unmapped_ranking_panel
+
+DATACITE_GRAPHQL_URL = f'{DATACITE_API_URL}/graphql'
+# One aggregated request per repository/provider: DataCite returns the funder
+# facet over all matching DOIs, so cost does not grow with the number of DOIs.
+FUNDER_FACET_QUERY = '''
+query($repositoryId: String, $memberId: String, $facetCount: Int) {
+  works(repositoryId: $repositoryId, memberId: $memberId, first: 0, facetCount: $facetCount,
+        query: "fundingReferences.funderIdentifierType:\\"Crossref Funder ID\\"") {
+    totalCount
+    funders { id title count }
+  }
+}
+'''
+FUNDER_FACET_TTL = 3600
+FUNDER_FACET_TIMEOUT = 120
+
+_funder_counts_cache = TTLCache(maxsize=256, ttl=FUNDER_FACET_TTL)
+_funder_counts_lock = threading.Lock()
+
+
+def query_funder_facets(repository_id=None, provider_id=None, facet_count=10000):
+    variables = {'repositoryId': repository_id, 'memberId': provider_id, 'facetCount': facet_count}
+    try:
+        response = requests.post(DATACITE_GRAPHQL_URL, json={'query': FUNDER_FACET_QUERY, 'variables': variables},
+                                 timeout=FUNDER_FACET_TIMEOUT)
+    except requests.exceptions.Timeout as e:
+        raise TimeoutError(f'DataCite did not answer within {FUNDER_FACET_TIMEOUT}s') from e
+    if response.status_code == 200:
+        works = (response.json().get('data') or {}).get('works') or {}
+        funders = works.get('funders')
+        if funders:
+            funder_counts = {}
+            for facet in funders:
+                funder_id = normalize_funder_id(facet.get('id') or '')
+                if funder_id:
+                    funder_counts[funder_id] = funder_counts.get(funder_id, 0) + facet['count']
+            return MappingProxyType(funder_counts)
+    return None
+
+
+def count_datacite_funders(repository_id=None, provider_id=None):
+    key = (repository_id, provider_id)
+    with _funder_counts_lock:
+        if key in _funder_counts_cache:
+            return _funder_counts_cache[key]
+    funder_counts = singleflight.group('DataCite funder facets').do(
+        key, lambda: query_funder_facets(repository_id, provider_id), timeout=FUNDER_FACET_TIMEOUT)
+    # Failed or empty lookups are not cached so they are retried on the next request
+    if funder_counts:
+        with _funder_counts_lock:
+            _funder_counts_cache[key] = funder_counts
+    return funder_counts
+
+
+def datacite_repository_view():
+    st.title("DataCite Repository - ROR/Funder Registry Overlap")
+    id_type = st.radio('Look up by:', ['Repository', 'Provider'], horizontal=True)
+    datacite_id = st.text_input(f'Enter DataCite {id_type.lower()} ID (e.g. {"cern.zenodo" if id_type == "Repository" else "cern"}):').strip().lower()
+    submit = st.button("Show overlap")
+    if submit:
+        # The button is only True for one run; the radios and downloads below rerun the script
+        st.session_state['datacite_report'] = (id_type, datacite_id)
+
+    if datacite_id and st.session_state.get('datacite_report') == (id_type, datacite_id):
+        with st.spinner('Checking for funding references...'):
+            try:
+                if id_type == 'Repository':
+                    funders = count_datacite_funders(repository_id=datacite_id)
+                else:
+                    funders = count_datacite_funders(provider_id=datacite_id)
+            except TimeoutError:
+                st.write(f"**Timed out checking funding references for {datacite_id}, please try again.**")
+                return
+        if funders:
+            with st.spinner('Generating report...'):
+                equivalents = data_store.get('mapping')
+                overlap = find_overlap(funders, equivalents)
+                unmapped_csv = unmapped_to_csv(funders, overlap)
+                mapped_csv = mapped_to_csv(equivalents, overlap)
+                chart = overlap_chart_png(('datacite', id_type, datacite_id), overlap, funders, equivalents)
+            st.image(chart, use_column_width=True)
+            st.caption(f"1. Number of Funder IDs used in {id_type.lower()} assertions that have been mapped to ROR IDs.\n2. Number of assertions by {id_type.lower()} where the Funder ID is mapped to a ROR ID")
+            col1, col2 = st.columns(2)
+            col1.download_button(
+                label="Download unmapped funders as CSV",
+                data=unmapped_csv,
+                file_name=f"{datacite_id}_unmapped_funders.csv",
+                mime="text/csv",
+            )
+            col2.download_button(
+                label="Download mapped funders as CSV",
+                data=mapped_csv,
+                file_name=f"{datacite_id}_mapped_funders.csv",
+                mime="text/csv",
+            )
+            ranking_key = ('datacite', id_type, datacite_id, data_store.version('mapping'), counts_version(funders))
+            unmapped_ranking_panel('datacite_repository', unmapped_ranking(ranking_key, funders, overlap))
+        else:
+            st.write(f"**No funding references found for {datacite_id}**")
+    elif submit:
+        st.write(f"**Please enter a {id_type.lower()} ID.**")
@@ -1,13 +1,11 @@
-import json
 import requests
 import pandas as pd
 import streamlit as st
+import data_store
+import singleflight
+from config import ROR_API_URL
 
-
-@st.cache_data(show_spinner=False)
-def load_funders(funders_file):
-    funders = load_json(funders_file)
-    return {funder['primary-name']: funder['id'] for funder in funders['funders']}
+SEARCH_ROR_TIMEOUT = 30
 
 
 def get_funder_id(funders, funder_name):
@@ -16,11 +14,20 @@ def get_funder_id(funders, funder_name):
 
 @st.cache_data(show_spinner=False)
 def search_ror(funder_id):
+    # st.cache_data only stores finished results; coalesce lookups still in flight
+    return singleflight.group('ROR search').do(
+        funder_id, lambda: query_ror(funder_id), timeout=SEARCH_ROR_TIMEOUT)
+
+
+def query_ror(funder_id):
     matched_records = []
-    url = 'https://api.ror.org/organizations'
+    url = f'{ROR_API_URL}/organizations'
     funder_id = funder_id.replace('http://dx.doi.org/10.13039/', '')
     params = {'query': funder_id}
-    response = requests.get(url, params=params)
+    try:
+        response = requests.get(url, params=params, timeout=SEARCH_ROR_TIMEOUT)
+    except requests.exceptions.Timeout as e:
+        raise TimeoutError(f'ROR did not answer for {funder_id} within {SEARCH_ROR_TIMEOUT}s') from e
     if response.status_code == 200:
         data = response.json()
         records = data.get('items', {})
@@ -49,22 +56,20 @@ def search_ror(funder_id):
     return None
 
 
-def load_json(filename):
-    with open(filename, 'r') as file:
-        data = json.load(file)
-    return data
-
-
 def funder_lookup_view():
     st.title("Funder Mapping Lookup")
-    funders = load_funders('data/funders.json')
+    funders = data_store.get('funders')
     funder_name = st.selectbox('Enter Funder name:', options=[''] + list(funders.keys()))
     submit = st.button("Search")
 
     if submit and funder_name:
         funder_id = get_funder_id(funders, funder_name)
         with st.spinner('Searching...'):
-            ror_records = search_ror(funder_id)
+            try:
+                ror_records = search_ror(funder_id)
+            except TimeoutError:
+                st.write(f"**Timed out searching ROR for {funder_name}, please try again.**")
+                return
         if ror_records:
             table_data = []
             for record in ror_records:
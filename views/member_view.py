@@ -1,60 +1,34 @@
-import json
-import requests
+import io
+import hashlib
+import threading
 import streamlit as st
 import pandas as pd
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-
-
-@st.cache_data(show_spinner=False)
-def load_members(members_file):
-    members = load_json(members_file)
-    return {member['primary-name']: member['id'] for member in members['members']}
+from cachetools import LRUCache, TTLCache
+from matplotlib.figure import Figure
+import data_store
+import jobs
+from crossref import MEMBER_FUNDERS_TTL, count_funders
+from overlap import find_overlap, hierarchical_overlap
+from views.unmapped_ranking_panel import unmapped_ranking, unmapped_ranking_panel
+
+# Reports built from local counts finish within the first wait; slower ones show progress and rerun
+MEMBER_REPORT_WAIT = 0.5
+MEMBER_REPORT_POLL_INTERVAL = 1
+# Passed to each text element instead of setting the global mpl.rcParams,
+# which every concurrent session would otherwise race on
+CHART_TEXT_STYLE = {'fontsize': 12, 'fontweight': 'bold'}
+
+_chart_cache = LRUCache(maxsize=256)
+_chart_cache_lock = threading.Lock()
+# Finished reports, shared so any session opening the same member renders without waiting
+_member_report_cache = TTLCache(maxsize=256, ttl=MEMBER_FUNDERS_TTL)
+_member_report_lock = threading.Lock()
 
 
 def get_member_id(members, member_name):
     return members.get(member_name)
 
 
-def count_funders(member_id, rows=1000):
-    base_url = 'https://api.crossref.org/members'
-    url = f"{base_url}/{member_id}/works"
-    funder_counts = {}
-    params = {'filter': 'has-funder:true',
-              'facet': 'funder-doi:*', 'rows': rows}
-    response = requests.get(url, params=params)
-    if response.status_code == 200:
-        data = response.json()
-        funders = data.get('message', {}).get('facets', {}).get(
-            'funder-doi', {}).get('values', None)
-        if funders:
-            for funder_id, count_works in funders.items():
-                funder_id = funder_id.replace(
-                    'https://doi.org/10.13039/', '')
-                funder_counts[funder_id] = count_works
-            return funder_counts
-    return None
-
-
-def load_json(filename):
-    with open(filename, 'r') as file:
-        data = json.load(file)
-    return data
-
-
-def find_overlap(funders, equivalents):
-    funders_ids = set(funders.keys())
-    equivalent_ids = set(equivalents.keys())
-    return funders_ids & equivalent_ids
-
-
-def display_pie_chart(title, values, labels):
-    plt.figure(figsize=(6, 6))
-    plt.pie(values, labels=labels, autopct='%1.1f%%')
-    plt.title(title)
-    st.pyplot(plt)
-
-
 def calculate_percentages(overlap, funders, equivalents):
     total_funders, overlapping_funders = len(funders), len(overlap)
     overlapping_funders_percentage = (
@@ -67,24 +41,42 @@ def calculate_percentages(overlap, funders, equivalents):
         overlapping_assertions / total_assertions) * 100
     non_overlapping_assertions_percentage = 100 - overlapping_assertions_percentage
 
-    fig, axs = plt.subplots(1, 2, figsize=(12, 6))
-    mpl.rcParams['font.size'] = 12
-    mpl.rcParams['font.weight'] = 'bold'
+    # A standalone Figure is not registered with pyplot, so nothing is shared between threads
+    fig = Figure(figsize=(12, 6))
+    axs = fig.subplots(1, 2)
     funder_colors = ['tab:blue', 'tab:orange']
     assertion_colors = ['green', 'pink']
 
     axs[0].pie([overlapping_funders_percentage, non_overlapping_funders_percentage], labels=[
-               'Overlapping', 'Non-overlapping'], autopct='%1.1f%%', colors=funder_colors)
-    axs[0].set_title(f"Overlapping vs Non-overlapping Funder IDs¹\n\n{format(overlapping_funders, ',d')} / {format(total_funders, ',d')} total funders", fontweight='bold')
+               'Overlapping', 'Non-overlapping'], autopct='%1.1f%%', colors=funder_colors, textprops=CHART_TEXT_STYLE)
+    axs[0].set_title(f"Overlapping vs Non-overlapping Funder IDs¹\n\n{format(overlapping_funders, ',d')} / {format(total_funders, ',d')} total funders", **CHART_TEXT_STYLE)
 
     axs[1].pie([overlapping_assertions_percentage, non_overlapping_assertions_percentage], labels=[
-               'Overlapping', 'Non-overlapping'], autopct='%1.1f%%', colors=assertion_colors)
-    axs[1].set_title(f"Overlapping vs Non-overlapping Assertions²\n\n{format(overlapping_assertions, ',d')} / {format(total_assertions, ',d')} total assertions", fontweight='bold')
+               'Overlapping', 'Non-overlapping'], autopct='%1.1f%%', colors=assertion_colors, textprops=CHART_TEXT_STYLE)
+    axs[1].set_title(f"Overlapping vs Non-overlapping Assertions²\n\n{format(overlapping_assertions, ',d')} / {format(total_assertions, ',d')} total assertions", **CHART_TEXT_STYLE)
 
-    plt.tight_layout()
+    fig.tight_layout()
     return fig
 
 
+def counts_version(funders):
+    return hashlib.sha1(repr(sorted(funders.items())).encode('utf-8')).hexdigest()
+
+
+def overlap_chart_png(chart_key, overlap, funders, equivalents):
+    """PNG bytes of the overlap chart, cached by chart key plus mapping and count data versions."""
+    key = (chart_key, data_store.version('mapping'), counts_version(funders))
+    with _chart_cache_lock:
+        png = _chart_cache.get(key)
+    if png is None:
+        buffer = io.BytesIO()
+        calculate_percentages(overlap, funders, equivalents).savefig(buffer, format='png', bbox_inches='tight')
+        png = buffer.getvalue()
+        with _chart_cache_lock:
+            _chart_cache[key] = png
+    return png
+
+
 def unmapped_to_csv(funders, overlap):
     unmapped_funders = {f'http://dx.doi.org/10.13039/{k}': v for k, v in funders.items() if k not in overlap}
     df = pd.DataFrame(list(unmapped_funders.items()),
@@ -101,40 +93,122 @@ def mapped_to_csv(ror_funder_mapping, overlap):
     return mapped_csv
 
 
+def member_data_versions(hierarchical):
+    """Versions of every dataset a member report is built from."""
+    names = ['mapping']
+    if hierarchical:
+        names.append('funder_ancestors')
+    if data_store.available('member_funder_counts'):
+        names.append('member_funder_counts')
+    return tuple(data_store.version(name) for name in names)
+
+
+def member_report_key(member_id, hierarchical):
+    return (member_id, hierarchical, member_data_versions(hierarchical))
+
+
+def cached_member_report(key):
+    with _member_report_lock:
+        return _member_report_cache.get(key)
+
+
+def build_member_report(member_id, hierarchical, job):
+    """Runs on a background worker; the finished report goes to the shared report cache."""
+    key = member_report_key(member_id, hierarchical)
+    versions = key[2]
+    job.progress = 'Checking for funding references'
+    funders = count_funders(member_id)
+    report = {'funders': funders}
+    if funders:
+        job.progress = 'Generating report'
+        equivalents = data_store.get('mapping')
+        if hierarchical:
+            overlap = hierarchical_overlap(funders, equivalents, data_store.get('funder_ancestors'))
+        else:
+            overlap = find_overlap(funders, equivalents)
+        ranking_key = ('crossref_member', member_id, hierarchical, versions, counts_version(funders))
+        report.update(
+            unmapped_csv=unmapped_to_csv(funders, overlap),
+            mapped_csv=mapped_to_csv(equivalents, overlap),
+            chart=overlap_chart_png(('crossref_member', member_id, hierarchical, versions), overlap, funders, equivalents),
+            ranking=unmapped_ranking(ranking_key, funders, overlap),
+        )
+        with _member_report_lock:
+            _member_report_cache[key] = report
+    return report
+
+
+def member_report_job(member_id, hierarchical):
+    """The member's report job, submitting one unless this session's job is still for the same report."""
+    key = member_report_key(member_id, hierarchical)
+    report_jobs = jobs.queue('Member reports')
+    job = report_jobs.get(st.session_state.get('member_job'))
+    while job is None or job.key != key:
+        job_id = report_jobs.submit(key, lambda job: build_member_report(member_id, hierarchical, job))
+        st.session_state['member_job'] = job_id
+        # None if the job finished and expired in between; submitting again finds its cached report or reruns it
+        job = report_jobs.get(job_id)
+    return job
+
+
+def render_member_report(member_id, report):
+    st.image(report['chart'], use_column_width=True)
+    st.caption("1. Number of Funder IDs used in member assertions that have been mapped to ROR IDs.\n2. Number of assertions by member where the Funder ID is mapped to a ROR ID")
+    col1, col2 = st.columns(2)
+    col1.download_button(
+        label="Download unmapped funders as CSV",
+        data=report['unmapped_csv'],
+        file_name=f"member_{member_id}_unmapped_funders.csv",
+        mime="text/csv",
+    )
+    col2.download_button(
+        label="Download mapped funders as CSV",
+        data=report['mapped_csv'],
+        file_name=f"member_{member_id}_mapped_funders.csv",
+        mime="text/csv",
+    )
+    unmapped_ranking_panel('member', report['ranking'])
+
+
 def member_view():
     st.title("Crossref Member - ROR/Funder Registry Overlap")
-    members = load_members('data/members.json')
+    members = data_store.get('members')
     member_name = st.selectbox('Enter Member Name:', options=[
                                ''] + list(members.keys()))
+    hierarchical = data_store.available('funder_ancestors') and st.checkbox(
+        'Count funders as mapped when a parent funder is mapped to ROR')
     submit = st.button("Show overlap")
-
-    if member_name and submit:
-        if member_name:
-            member_id = get_member_id(members, member_name)
-        with st.spinner('Checking for funding references...'):
-            funders = count_funders(member_id)
-        if funders:
-            with st.spinner('Generating report...'):
-                equivalents = load_json('data/ror_funder_registry_mapping.json')
-                overlap = find_overlap(funders, equivalents)
-                unmapped_csv = unmapped_to_csv(funders, overlap)
-                mapped_csv = mapped_to_csv(equivalents, overlap)
-                fig = calculate_percentages(overlap, funders, equivalents)
-            st.pyplot(fig)
-            st.caption("1. Number of Funder IDs used in member assertions that have been mapped to ROR IDs.\n2. Number of assertions by member where the Funder ID is mapped to a ROR ID")
-            col1, col2 = st.columns(2)
-            col1.download_button(
-                label="Download unmapped funders as CSV",
-                data=unmapped_csv,
-                file_name=f"member_{member_id}_unmapped_funders.csv",
-                mime="text/csv",
-            )
-            col2.download_button(
-                label="Download mapped funders as CSV",
-                data=mapped_csv,
-                file_name=f"member_{member_id}_mapped_funders.csv",
-                mime="text/csv",
-            )
+    if submit:
+        # Kept across reruns so the widgets inside the report keep it on screen
+        st.session_state['member_report'] = member_name
+        # A fresh submit retries a report whose last job failed
+        st.session_state.pop('member_job', None)
+
+    if member_name and st.session_state.get('member_report') == member_name:
+        member_id = get_member_id(members, member_name)
+        report = cached_member_report(member_report_key(member_id, hierarchical))
+        if report is None:
+            try:
+                job = member_report_job(member_id, hierarchical)
+            except jobs.QueueFullError:
+                st.write("**Too many reports are being generated right now, please try again shortly.**")
+                return
+            if not job.wait(MEMBER_REPORT_WAIT):
+                # The job keeps running if the user reruns or switches views; poll until it finishes
+                st.info(f"{job.progress} for {member_name}...")
+                # Rerun as soon as the job finishes, or after the interval to refresh its progress
+                job.wait(MEMBER_REPORT_POLL_INTERVAL)
+                st.experimental_rerun()
+                return
+            if isinstance(job.error, TimeoutError):
+                st.write(f"**Timed out checking funding references for {member_name}, please try again.**")
+                return
+            if job.error is not None:
+                st.write(f"**Could not check funding references for {member_name}, please try again.**")
+                return
+            report = job.result
+        if report['funders']:
+            render_member_report(member_id, report)
         else:
             st.write(f"**No funding references found for {member_name}**")
     elif submit:
@@ -0,0 +1,35 @@
+import pandas as pd
+import streamlit as st
+import data_store
+from bulk_lookup import normalize_ror_id
+
+
+def funder_table(entry):
+    crossref_counts = data_store.get('crossref_counts')
+    datacite_counts = data_store.get('datacite_counts')
+    return pd.DataFrame([{
+        "Funder ID": f'http://dx.doi.org/10.13039/{funder_id}',
+        "Crossref assertions": crossref_counts.get(funder_id, 0),
+        "DataCite assertions": datacite_counts.get(funder_id, 0),
+    } for funder_id in entry['funder_ids']])
+
+
+def ror_lookup_view():
+    st.title("ROR Organization - Funder ID Lookup")
+    ror_index = data_store.get('ror_index')
+    ror_names = data_store.get('ror_names')
+    ror_name = st.selectbox('Select ROR organization name:', options=[''] + sorted(ror_names.keys())) if ror_names else ''
+    ror_id_input = st.text_input('Or enter ROR ID:')
+    submit = st.button("Search")
+
+    if submit and (ror_name or ror_id_input):
+        ror_id = ror_names[ror_name] if ror_name else normalize_ror_id(ror_id_input)
+        entry = ror_index.get(ror_id)
+        if entry:
+            st.markdown(f"**{entry['name'] or ror_id}** ({ror_id})")
+            st.markdown(f"{len(entry['funder_ids'])} Funder IDs, {format(entry['crossref_count'], ',d')} Crossref assertions, {format(entry['datacite_count'], ',d')} DataCite assertions")
+            st.markdown(funder_table(entry).to_markdown(index=False), unsafe_allow_html=True)
+        else:
+            st.markdown(f"**No Funder IDs mapped to {ror_name or ror_id_input} - [Request?](https://curation-request.ror.org)**")
+    elif submit:
+        st.write(f"**Please select an organization or enter a ROR ID.**")
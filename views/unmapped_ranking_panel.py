@@ -0,0 +1,49 @@
+import math
+import threading
+import streamlit as st
+from cachetools import LRUCache
+import data_store
+from overlap import find_overlap, rank_unmapped, coverage_if_top_mapped
+
+PAGE_SIZE = 25
+
+_ranking_cache = LRUCache(maxsize=256)
+_ranking_cache_lock = threading.Lock()
+
+
+def unmapped_ranking(cache_key, funders, overlap):
+    """Sorted once per cache key; pages and top-K coverage are then slices and lookups."""
+    with _ranking_cache_lock:
+        ranking = _ranking_cache.get(cache_key)
+    if ranking is None:
+        ranking = rank_unmapped(funders, overlap)
+        with _ranking_cache_lock:
+            _ranking_cache[cache_key] = ranking
+    return ranking
+
+
+def source_unmapped_ranking(source):
+    funders = data_store.get(f'{source}_counts')
+    cache_key = (source, data_store.version('mapping'), data_store.version(f'{source}_counts'))
+    with _ranking_cache_lock:
+        ranking = _ranking_cache.get(cache_key)
+    if ranking is None:
+        ranking = unmapped_ranking(cache_key, funders, find_overlap(funders, data_store.get('mapping')))
+    return ranking
+
+
+def unmapped_ranking_panel(key, ranking):
+    st.subheader("Top unmapped funders by assertions")
+    if ranking.empty:
+        st.write("**All funders are mapped to ROR IDs.**")
+        return
+    col1, col2 = st.columns(2)
+    top_k = col1.number_input('Map the top K funders:', min_value=1, max_value=len(ranking),
+                              value=min(10, len(ranking)), step=1, key=f'{key}_top_k')
+    pages = math.ceil(len(ranking) / PAGE_SIZE)
+    page = col2.number_input(f'Page (of {format(pages, ",d")}):', min_value=1, max_value=pages,
+                             value=1, step=1, key=f'{key}_page')
+    st.markdown(f"Mapping the top **{format(int(top_k), ',d')}** unmapped funders would raise assertion coverage "
+                f"from **{coverage_if_top_mapped(ranking, 0):.2f}%** to **{coverage_if_top_mapped(ranking, int(top_k)):.2f}%**.")
+    start = (int(page) - 1) * PAGE_SIZE
+    st.dataframe(ranking.iloc[start:start + PAGE_SIZE], use_container_width=True)